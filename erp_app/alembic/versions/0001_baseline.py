@@ -0,0 +1,146 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+Databases die eerder met ``create_all`` zijn aangemaakt hebben deze tabellen al;
+die worden overgeslagen, zodat ``alembic upgrade head`` op zowel nieuwe als
+bestaande databases werkt.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _bestaat(tabel: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(tabel)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _bestaat("klanten"):
+        op.create_table(
+            "klanten",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("voornaam", sa.String(), nullable=True),
+            sa.Column("achternaam", sa.String(), nullable=True),
+            sa.Column("straatnaam", sa.String(), nullable=True),
+            sa.Column("huisnummer", sa.String(), nullable=True),
+            sa.Column("postcode", sa.String(), nullable=True),
+            sa.Column("woonplaats", sa.String(), nullable=True),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("telefoon", sa.String(), nullable=True),
+            sa.Column("klantnummer", sa.String(), nullable=True),
+            sa.Column("registratiedatum", sa.Date(), nullable=True),
+            sa.Column("klanttype", sa.Enum("particulier", "zakelijk", "leverancier", name="klanttypeenum"), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_klanten_id", "klanten", ["id"])
+        op.create_index("ix_klanten_voornaam", "klanten", ["voornaam"])
+        op.create_index("ix_klanten_achternaam", "klanten", ["achternaam"])
+        op.create_index("ix_klanten_postcode", "klanten", ["postcode"])
+        op.create_index("ix_klanten_email", "klanten", ["email"], unique=True)
+        op.create_index("ix_klanten_klantnummer", "klanten", ["klantnummer"], unique=True)
+
+    if not _bestaat("projecten"):
+        op.create_table(
+            "projecten",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("projectnaam", sa.String(), nullable=True),
+            sa.Column("klant_id", sa.Integer(), nullable=True),
+            sa.Column("omschrijving", sa.Text(), nullable=True),
+            sa.Column("straat", sa.String(), nullable=True),
+            sa.Column("postcode", sa.String(), nullable=True),
+            sa.Column("woonplaats", sa.String(), nullable=True),
+            sa.Column("status", sa.Enum("ingepland", "bezig", "afgerond", name="projectstatusenum"), nullable=True),
+            sa.Column("startdatum", sa.Date(), nullable=True),
+            sa.Column("einddatum", sa.Date(), nullable=True),
+            sa.Column("installateurs", sa.String(), nullable=True),
+            sa.Column("aangemaakt_op", sa.DateTime(), nullable=True),
+            sa.Column("bijgewerkt_op", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["klant_id"], ["klanten.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_projecten_id", "projecten", ["id"])
+        op.create_index("ix_projecten_projectnaam", "projecten", ["projectnaam"])
+
+    if not _bestaat("taken"):
+        op.create_table(
+            "taken",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("titel", sa.String(), nullable=True),
+            sa.Column("status", sa.Enum("open", "bezig", "afgerond", name="taakstatusenum"), nullable=True),
+            sa.Column("uitvoerder", sa.String(), nullable=True),
+            sa.Column("kleur", sa.String(), nullable=True),
+            sa.Column("datum", sa.Date(), nullable=True),
+            sa.Column("project_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["project_id"], ["projecten.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_taken_id", "taken", ["id"])
+
+    if not _bestaat("afspraken"):
+        op.create_table(
+            "afspraken",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("titel", sa.String(), nullable=True),
+            sa.Column("datum", sa.Date(), nullable=True),
+            sa.Column("notities", sa.Text(), nullable=True),
+            sa.Column("project_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["project_id"], ["projecten.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_afspraken_id", "afspraken", ["id"])
+
+    if not _bestaat("documentmappen"):
+        op.create_table(
+            "documentmappen",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("naam", sa.String(), nullable=True),
+            sa.Column("project_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["project_id"], ["projecten.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_documentmappen_id", "documentmappen", ["id"])
+
+    if not _bestaat("documenten"):
+        op.create_table(
+            "documenten",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("bestandsnaam", sa.String(), nullable=True),
+            sa.Column("pad", sa.String(), nullable=True),
+            sa.Column("project_id", sa.Integer(), nullable=True),
+            sa.Column("map_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["map_id"], ["documentmappen.id"]),
+            sa.ForeignKeyConstraint(["project_id"], ["projecten.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_documenten_id", "documenten", ["id"])
+
+    if not _bestaat("rapport_rollups"):
+        op.create_table(
+            "rapport_rollups",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("rapport", sa.String(), nullable=False),
+            sa.Column("sleutel", sa.String(), nullable=False),
+            sa.Column("aantal", sa.Integer(), nullable=False),
+            sa.Column("totaal", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("rapport", "sleutel", name="uq_rapport_sleutel"),
+        )
+        op.create_index("ix_rapport_rollups_id", "rapport_rollups", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabel in ("rapport_rollups", "documenten", "documentmappen", "afspraken", "taken", "projecten", "klanten"):
+        op.drop_table(tabel)
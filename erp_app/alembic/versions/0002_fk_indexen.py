@@ -0,0 +1,54 @@
+"""indexen op foreign keys en veelgebruikte filters
+
+Revision ID: 0002_fk_indexen
+Revises: 0001_baseline
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_fk_indexen'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (naam, tabel, kolommen)
+INDEXEN = [
+    # Foreign keys: relatie-loads en joins zonder table scan
+    ("ix_projecten_klant_id", "projecten", ["klant_id"]),
+    ("ix_taken_project_id", "taken", ["project_id"]),
+    ("ix_afspraken_project_id", "afspraken", ["project_id"]),
+    ("ix_documentmappen_project_id", "documentmappen", ["project_id"]),
+    ("ix_documenten_project_id", "documenten", ["project_id"]),
+    ("ix_documenten_map_id", "documenten", ["map_id"]),
+    # Projectlijst sorteert op startdatum; rapportage groepeert op status + startdatum
+    ("ix_projecten_startdatum", "projecten", ["startdatum"]),
+    ("ix_projecten_status_startdatum", "projecten", ["status", "startdatum"]),
+    # Dagplanning filtert taken op datum en groepeert per uitvoerder
+    ("ix_taken_datum_uitvoerder", "taken", ["datum", "uitvoerder"]),
+    # Referentietelling in de opslaglaag
+    ("ix_documenten_pad", "documenten", ["pad"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bestaand = {
+        index["name"]
+        for tabel in {t for _, t, _ in INDEXEN}
+        for index in sa.inspect(op.get_bind()).get_indexes(tabel)
+    }
+    for naam, tabel, kolommen in INDEXEN:
+        if naam not in bestaand:
+            op.create_index(naam, tabel, kolommen)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for naam, tabel, _ in reversed(INDEXEN):
+        op.drop_index(naam, table_name=tabel)
@@ -0,0 +1,87 @@
+"""soft delete en audit log
+
+Revision ID: 0003_soft_delete_audit
+Revises: 0002_fk_indexen
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_soft_delete_audit'
+down_revision: Union[str, None] = '0002_fk_indexen'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIEF = sa.text("verwijderd_op IS NULL")
+
+
+def _indexen(tabel: str) -> dict:
+    return {i["name"]: i for i in sa.inspect(op.get_bind()).get_indexes(tabel)}
+
+
+def _actief_index(naam: str, tabel: str, kolommen: list[str], unique: bool = False) -> None:
+    if naam not in _indexen(tabel):
+        op.create_index(naam, tabel, kolommen, unique=unique, sqlite_where=ACTIEF, postgresql_where=ACTIEF)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Elke stap apart bewaakt: create_all kan een deel (bijv. audit_log) al hebben aangemaakt
+    inspector = sa.inspect(op.get_bind())
+    for tabel in ("klanten", "taken", "documenten"):
+        if "verwijderd_op" not in {k["name"] for k in inspector.get_columns(tabel)}:
+            op.add_column(tabel, sa.Column("verwijderd_op", sa.DateTime(), nullable=True))
+
+    # E-mail en klantnummer mogen na soft delete opnieuw gebruikt worden
+    indexen = _indexen("klanten")
+    for naam, kolom in (("ix_klanten_email", "email"), ("ix_klanten_klantnummer", "klantnummer")):
+        if naam in indexen and indexen[naam]["unique"]:
+            op.drop_index(naam, table_name="klanten")
+            del indexen[naam]
+        if naam not in indexen:
+            op.create_index(naam, "klanten", [kolom])
+    _actief_index("uq_klanten_email_actief", "klanten", ["email"], unique=True)
+    _actief_index("uq_klanten_klantnummer_actief", "klanten", ["klantnummer"], unique=True)
+
+    _actief_index("ix_taken_actief_project_id", "taken", ["project_id"])
+    _actief_index("ix_documenten_actief_project_id", "documenten", ["project_id"])
+    _actief_index("ix_documenten_actief_map_id", "documenten", ["map_id"])
+
+    if not inspector.has_table("audit_log"):
+        op.create_table(
+            "audit_log",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("tabel", sa.String(), nullable=False),
+            sa.Column("rij_id", sa.Integer(), nullable=False),
+            sa.Column("actie", sa.String(), nullable=False),
+            sa.Column("wijzigingen", sa.Text(), nullable=True),
+            sa.Column("tijdstip", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if "ix_audit_log_tabel_rij" not in _indexen("audit_log"):
+        op.create_index("ix_audit_log_tabel_rij", "audit_log", ["tabel", "rij_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_audit_log_tabel_rij", table_name="audit_log")
+    op.drop_table("audit_log")
+
+    op.drop_index("ix_documenten_actief_map_id", table_name="documenten")
+    op.drop_index("ix_documenten_actief_project_id", table_name="documenten")
+    op.drop_index("ix_taken_actief_project_id", table_name="taken")
+    op.drop_index("uq_klanten_klantnummer_actief", table_name="klanten")
+    op.drop_index("uq_klanten_email_actief", table_name="klanten")
+    op.drop_index("ix_klanten_klantnummer", table_name="klanten")
+    op.drop_index("ix_klanten_email", table_name="klanten")
+    op.create_index("ix_klanten_email", "klanten", ["email"], unique=True)
+    op.create_index("ix_klanten_klantnummer", "klanten", ["klantnummer"], unique=True)
+
+    for tabel in ("documenten", "taken", "klanten"):
+        with op.batch_alter_table(tabel) as batch_op:
+            batch_op.drop_column("verwijderd_op")
@@ -0,0 +1,41 @@
+"""blokkeersleutels voor duplicaatdetectie van klanten
+
+Revision ID: 0004_klant_dedupe_sleutels
+Revises: 0003_soft_delete_audit
+Create Date: 2026-10-19 11:30:00.000000
+
+De kolommen worden leeg toegevoegd; vul ze daarna online met
+``python -m app.dedupe`` (batchgewijs via app/backfill.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_klant_dedupe_sleutels'
+down_revision: Union[str, None] = '0003_soft_delete_audit'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    kolommen = {k["name"] for k in sa.inspect(op.get_bind()).get_columns("klanten")}
+    if "naam_sleutel" in kolommen:
+        # Database is al met create_all op dit schema aangemaakt
+        return
+    op.add_column("klanten", sa.Column("naam_sleutel", sa.String(), nullable=True))
+    op.add_column("klanten", sa.Column("adres_sleutel", sa.String(), nullable=True))
+    op.create_index("ix_klanten_naam_sleutel", "klanten", ["naam_sleutel"])
+    op.create_index("ix_klanten_adres_sleutel", "klanten", ["adres_sleutel"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_klanten_adres_sleutel", table_name="klanten")
+    op.drop_index("ix_klanten_naam_sleutel", table_name="klanten")
+    with op.batch_alter_table("klanten") as batch_op:
+        batch_op.drop_column("adres_sleutel")
+        batch_op.drop_column("naam_sleutel")
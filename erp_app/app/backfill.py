@@ -0,0 +1,81 @@
+"""Online backfill van grote tabellen in kleine batches.
+
+Elke batch draait in een eigen korte transactie, met keyset-paginering op ``id``
+en een pauze ertussen. Zo houdt een backfill de SQLite-schrijflock nooit langer
+dan één batch vast en kunnen gewone verzoeken tussendoor schrijven.
+
+Voorbeeld, na een migratie die een kolom toevoegt::
+
+    from app.backfill import backfill
+    from app.database import engine
+    from app.models import Klant
+
+    backfill(engine, Klant.__table__, waarden={"klanttype": "particulier"},
+             voorwaarde=Klant.__table__.c.klanttype.is_(None))
+"""
+import logging
+import time
+from typing import Callable, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(
+    engine: Engine,
+    tabel: sa.Table,
+    waarden: Optional[dict] = None,
+    bereken: Optional[Callable[[sa.Row], dict]] = None,
+    kolommen: tuple = (),
+    voorwaarde=None,
+    batch_grootte: int = 1000,
+    pauze: float = 0.05,
+) -> int:
+    """Werk alle rijen van ``tabel`` (die aan ``voorwaarde`` voldoen) batchgewijs bij.
+
+    Geef ``waarden`` voor een vaste SQL-update (kolom -> waarde of expressie), of
+    ``bereken`` om per rij in Python nieuwe waarden te bepalen; die krijgt de rij met
+    ``id`` en ``kolommen``. Geeft het aantal bijgewerkte rijen terug.
+    """
+    if (waarden is None) == (bereken is None):
+        raise ValueError("Geef precies één van 'waarden' of 'bereken' op")
+
+    id_kolom = tabel.c.id
+    selectie = [id_kolom] + [tabel.c[k] for k in kolommen]
+    laatste_id, totaal = None, 0
+
+    while True:
+        with engine.begin() as conn:
+            query = sa.select(*selectie).order_by(id_kolom).limit(batch_grootte)
+            if laatste_id is not None:
+                query = query.where(id_kolom > laatste_id)
+            if voorwaarde is not None:
+                query = query.where(voorwaarde)
+            rijen = conn.execute(query).all()
+            if not rijen:
+                break
+
+            if waarden is not None:
+                ids = [rij.id for rij in rijen]
+                conn.execute(sa.update(tabel).where(id_kolom.in_(ids)).values(**waarden))
+            else:
+                # Bindparams krijgen een prefix; kolomnamen zelf zijn gereserveerd in de SET-clausule
+                berekend = [bereken(rij) for rij in rijen]
+                velden = list(berekend[0])
+                conn.execute(
+                    sa.update(tabel)
+                    .where(id_kolom == sa.bindparam("_id"))
+                    .values({k: sa.bindparam(f"_w_{k}") for k in velden}),
+                    [{"_id": rij.id, **{f"_w_{k}": v for k, v in w.items()}} for rij, w in zip(rijen, berekend)],
+                )
+
+        laatste_id = rijen[-1].id
+        totaal += len(rijen)
+        logger.info("Backfill %s: %d rijen bijgewerkt (t/m id %s)", tabel.name, totaal, laatste_id)
+        if len(rijen) < batch_grootte:
+            break
+        time.sleep(pauze)
+
+    return totaal
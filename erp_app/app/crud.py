@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, asc
-from . import models, schemas
-from datetime import date
+from . import models, schemas, rapportage, historie, dedupe
+from datetime import date, datetime
+
+# Bovengrens voor skip/limit-lijsten en zoekresultaten
+MAX_PAGINA_GROOTTE = 200
 
 # ======================
 # KLANT CRUD
@@ -12,12 +15,15 @@ def create_klant(db: Session, klant: schemas.KlantCreate):
     if not klant_data.get("registratiedatum"):
         klant_data["registratiedatum"] = date.today()
     db_klant = models.Klant(**klant_data)
+    dedupe.zet_sleutels(db_klant)
     db.add(db_klant)
+    rapportage.pas_toe(db, rapportage.klant_bijdragen(db_klant))
     db.commit()
     db.refresh(db_klant)
     return db_klant
 
 def get_klanten(db: Session, skip: int = 0, limit: int = 100):
+    limit = min(limit, MAX_PAGINA_GROOTTE)
     return db.query(models.Klant).offset(skip).limit(limit).all()
 
 def get_klant(db: Session, klant_id: int):
@@ -42,6 +48,7 @@ def zoek_klanten(db: Session, zoekterm: str):
             )
         )
         .order_by(asc(models.Klant.achternaam))
+        .limit(MAX_PAGINA_GROOTTE)
         .all()
     )
 
@@ -61,8 +68,14 @@ def update_klant(db: Session, klant_id: int, klant: schemas.KlantCreate):
     db_klant = db.query(models.Klant).filter(models.Klant.id == klant_id).first()
     if not db_klant:
         return None
-    for key, value in klant.dict().items():
+    klant_data = klant.dict()
+    bepalend = {k: klant_data[k] for k in rapportage.BEPALENDE_VELDEN[models.Klant]}
+    if not rapportage.wijzig(db, db_klant, bepalend, rapportage.klant_bijdragen):
+        db.rollback()
+        return None
+    for key, value in klant_data.items():
         setattr(db_klant, key, value)
+    dedupe.zet_sleutels(db_klant)
     db.commit()
     db.refresh(db_klant)
     return db_klant
@@ -70,8 +83,11 @@ def update_klant(db: Session, klant_id: int, klant: schemas.KlantCreate):
 def delete_klant(db: Session, klant_id: int):
     db_klant = db.query(models.Klant).filter(models.Klant.id == klant_id).first()
     if db_klant:
-        db.delete(db_klant)
+        if not rapportage.wijzig(db, db_klant, {"verwijderd_op": datetime.utcnow()}, rapportage.klant_bijdragen):
+            db.rollback()
+            return None
         db.commit()
+    return db_klant
 
 # ======================
 # PROJECT CRUD
@@ -91,12 +107,15 @@ def create_project(db: Session, project: schemas.ProjectCreate):
         installateurs=project.installateurs
     )
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    # Alleen flushen voor het id: project en rollup-delta worden samen gecommit
+    db.flush()
 
+    bijdragen = rapportage.project_bijdragen(db_project)
     for taak in project.taken:
         db_taak = models.Taak(**taak.dict(), project_id=db_project.id)
         db.add(db_taak)
+        bijdragen += rapportage.taak_bijdragen(db_taak)
+    rapportage.pas_toe(db, bijdragen)
 
     for afspraak in project.afspraken:
         db_afspraak = models.Afspraak(**afspraak.dict(), project_id=db_project.id)
@@ -110,6 +129,7 @@ def create_project(db: Session, project: schemas.ProjectCreate):
     return db_project
 
 def get_projecten(db: Session, skip: int = 0, limit: int = 100):
+    limit = min(limit, MAX_PAGINA_GROOTTE)
     return db.query(models.Project).order_by(models.Project.startdatum).offset(skip).limit(limit).all()
 
 def get_project(db: Session, project_id: int):
@@ -118,7 +138,7 @@ def get_project(db: Session, project_id: int):
 def update_project_status(db: Session, project_id: int, status: str):
     project = get_project(db, project_id)
     if project:
-        project.status = status
+        rapportage.wijzig(db, project, {"status": status}, rapportage.project_bijdragen)
         db.commit()
         db.refresh(project)
     return project
@@ -134,6 +154,7 @@ def update_installateurs(db: Session, project_id: int, installateurs: str):
 def add_taak_to_project(db: Session, project_id: int, taak: schemas.TaakCreate):
     db_taak = models.Taak(**taak.dict(), project_id=project_id)
     db.add(db_taak)
+    rapportage.pas_toe(db, rapportage.taak_bijdragen(db_taak))
     db.commit()
     db.refresh(db_taak)
     return db_taak
@@ -141,7 +162,9 @@ def add_taak_to_project(db: Session, project_id: int, taak: schemas.TaakCreate):
 def update_taak_status(db: Session, taak_id: int, status: str):
     taak = db.query(models.Taak).filter(models.Taak.id == taak_id).first()
     if taak:
-        taak.status = status
+        if not rapportage.wijzig(db, taak, {"status": status}, rapportage.taak_bijdragen):
+            db.rollback()
+            return None
         db.commit()
         db.refresh(taak)
     return taak
@@ -149,8 +172,11 @@ def update_taak_status(db: Session, taak_id: int, status: str):
 def delete_taak(db: Session, taak_id: int):
     taak = db.query(models.Taak).filter(models.Taak.id == taak_id).first()
     if taak:
-        db.delete(taak)
+        if not rapportage.wijzig(db, taak, {"verwijderd_op": datetime.utcnow()}, rapportage.taak_bijdragen):
+            db.rollback()
+            return None
         db.commit()
+    return taak
 
 from .models import DocumentMap, Document
 
@@ -164,6 +190,16 @@ def create_document_map(db: Session, project_id: int, map_data: schemas.Document
 def get_document_mappen(db: Session, project_id: int):
     return db.query(DocumentMap).filter(DocumentMap.project_id == project_id).all()
 
+def get_of_maak_document_map(db: Session, project_id: int, naam: str):
+    db_map = (
+        db.query(DocumentMap)
+        .filter(DocumentMap.project_id == project_id, DocumentMap.naam == naam)
+        .first()
+    )
+    if db_map:
+        return db_map
+    return create_document_map(db, project_id, schemas.DocumentMapCreate(naam=naam))
+
 def upload_document(db: Session, document: schemas.DocumentCreate):
     db_doc = Document(
         bestandsnaam=document.bestandsnaam,
@@ -182,6 +218,6 @@ def get_documenten_in_map(db: Session, map_id: int):
 def delete_document(db: Session, document_id: int):
     doc = db.query(Document).filter(Document.id == document_id).first()
     if doc:
-        db.delete(doc)
+        historie.markeer_verwijderd(doc)
         db.commit()
     return doc
\ No newline at end of file
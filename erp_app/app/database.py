@@ -1,20 +1,146 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./erp.db")  # Pas eventueel aan naar jouw pad
+
+# Leesreplica's: kommagescheiden URL's, en/of een periodieke snapshot van de SQLite-database
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+SNAPSHOT_PAD = os.getenv("DATABASE_SNAPSHOT_PAD")
+SNAPSHOT_INTERVAL = float(os.getenv("DATABASE_SNAPSHOT_INTERVAL", "30"))
+
+# Na een schrijfactie leest dezelfde client zo lang van de primary (read-your-writes)
+PIN_COOKIE = "erp_primary_tot"
+PIN_SECONDEN = int(os.getenv("DATABASE_PIN_SECONDEN", "10"))
+
+POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
 
-DATABASE_URL = "sqlite:///./erp.db"  # Pas eventueel aan naar jouw pad
 
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL, connect_args=_connect_args(DATABASE_URL), pool_size=POOL_SIZE
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [create_engine(url, connect_args=_connect_args(url)) for url in REPLICA_URLS]
+if SNAPSHOT_PAD:
+    # NullPool: elke sessie opent het snapshotbestand opnieuw en ziet zo de laatste versie
+    replica_engines.append(create_engine(
+        f"sqlite:///file:{os.path.abspath(SNAPSHOT_PAD)}?mode=ro&uri=true",
+        connect_args={"check_same_thread": False},
+        poolclass=NullPool,
+    ))
+_replica_sessions = itertools.cycle(
+    [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in replica_engines] or [SessionLocal]
+)
+
 Base = declarative_base()
 
-# Dependency die je in klanten.py gebruikt
-def get_db():
+
+def prewarm_pool():
+    """Open alle poolverbindingen vooraf, zodat de eerste verzoeken niet op een connect wachten."""
+    verbindingen = [engine.connect() for _ in range(POOL_SIZE)]
+    try:
+        for conn in verbindingen:
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in verbindingen:
+            conn.close()
+
+
+# ======================
+# SQLITE SNAPSHOT-REPLICA
+# ======================
+
+def maak_snapshot():
+    """Kopieer de primary SQLite-database consistent naar ``SNAPSHOT_PAD``."""
+    # Tijdelijk bestand per proces, zodat gelijktijdige snapshots elkaar niet overschrijven
+    tijdelijk = f"{SNAPSHOT_PAD}.{os.getpid()}.tmp"
+    try:
+        bron = sqlite3.connect(engine.url.database)
+        doel = sqlite3.connect(tijdelijk)
+        try:
+            bron.backup(doel)
+        finally:
+            doel.close()
+            bron.close()
+        os.replace(tijdelijk, SNAPSHOT_PAD)
+    finally:
+        if os.path.exists(tijdelijk):
+            os.remove(tijdelijk)
+
+
+def start_snapshot_replica():
+    """Maak direct een snapshot en ververs die daarna elke ``SNAPSHOT_INTERVAL`` seconden.
+
+    ``app.server`` doet dit eenmalig in het hoofdproces; de workers slaan het dan over.
+    """
+    if not SNAPSHOT_PAD or engine.dialect.name != "sqlite" or os.getenv("ERP_SNAPSHOT_DOOR_SERVER"):
+        return
+    try:
+        maak_snapshot()
+    except (sqlite3.Error, OSError):
+        # Met een oudere snapshot kunnen we verder; zonder snapshot is de replica onbruikbaar
+        if not os.path.exists(SNAPSHOT_PAD):
+            raise
+        logger.warning("Snapshot-replica kon niet worden ververst; de vorige snapshot blijft in gebruik",
+                       exc_info=True)
+
+    def ververs():
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL)
+            try:
+                maak_snapshot()
+            except (sqlite3.Error, OSError):
+                logger.warning("Snapshot-replica kon niet worden ververst", exc_info=True)
+
+    threading.Thread(target=ververs, name="snapshot-replica", daemon=True).start()
+
+
+# ======================
+# DEPENDENCIES
+# ======================
+
+def get_write_db(response: Response):
+    """Sessie op de primary; na een commit wordt de client tijdelijk aan de primary gepind."""
     db = SessionLocal()
+    if replica_engines:
+        @event.listens_for(db, "after_commit")
+        def pin_client(session):
+            response.set_cookie(PIN_COOKIE, str(int(time.time()) + PIN_SECONDEN),
+                                max_age=PIN_SECONDEN, httponly=True, samesite="lax")
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(request: Request):
+    """Sessie op een leesreplica, of op de primary als de client net zelf heeft geschreven."""
+    try:
+        gepind = int(request.cookies.get(PIN_COOKIE, "0")) > time.time()
+    except ValueError:
+        gepind = False
+    db = SessionLocal() if gepind else next(_replica_sessions)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency die je in klanten.py gebruikt; schrijft altijd naar de primary
+get_db = get_write_db
@@ -0,0 +1,248 @@
+"""Detectie en samenvoegen van dubbele klanten.
+
+Elke klant krijgt twee blokkeersleutels: ``adres_sleutel`` (genormaliseerde
+postcode + huisnummer) en ``naam_sleutel`` (fonetische code van de achternaam).
+Bij het aanmaken worden alleen klanten met dezelfde sleutel gescoord; de
+batchjob groepeert alle klanten op deze sleutels en vergelijkt alleen binnen
+een blok, zodat de looptijd vrijwel lineair blijft.
+
+Sleutels van bestaande klanten vullen: ``python -m app.dedupe``.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import NamedTuple, Optional
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from . import models, rapportage
+
+DREMPEL = 0.75
+MAX_KANDIDATEN = 50
+MAX_BLOK = 200  # grotere blokken zijn te generiek om paarsgewijs te vergelijken
+
+TUSSENVOEGSELS = {"van", "de", "der", "den", "het", "ter", "ten", "te", "in", "op", "'t", "la", "le"}
+
+# Volgorde is belangrijk: langere klankcombinaties eerst
+KLANKEN = [
+    ("sch", "s"), ("ij", "y"), ("ei", "y"), ("ch", "g"), ("ph", "f"), ("dt", "t"),
+    ("ck", "k"), ("c", "k"), ("q", "k"), ("x", "ks"), ("z", "s"), ("v", "f"), ("w", "v"),
+]
+KLINKERS = set("aeiouy")
+
+
+# ======================
+# SLEUTELS
+# ======================
+
+def _normaliseer(tekst: Optional[str]) -> str:
+    tekst = unicodedata.normalize("NFKD", tekst or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z' ]", "", tekst.lower()).strip()
+
+
+def fonetisch(achternaam: Optional[str]) -> str:
+    woorden = _normaliseer(achternaam).split()
+    while len(woorden) > 1 and woorden[0] in TUSSENVOEGSELS:
+        woorden.pop(0)
+    naam = "".join(woorden).replace("'", "")
+    if not naam:
+        return ""
+    for van, naar in KLANKEN:
+        naam = naam.replace(van, naar)
+    if naam.endswith("d"):
+        naam = naam[:-1] + "t"
+    # Eerste letter behouden, daarna klinkers en stomme h weg en dubbele medeklinkers samen
+    code = naam[0]
+    for letter in naam[1:]:
+        if letter not in KLINKERS and letter != "h" and letter != code[-1]:
+            code += letter
+    return code
+
+
+def adres_sleutel(postcode: Optional[str], huisnummer: Optional[str]) -> str:
+    pc = (postcode or "").replace(" ", "").upper()
+    nr = (huisnummer or "").replace(" ", "").upper()
+    return f"{pc}|{nr}" if pc and nr else ""
+
+
+def zet_sleutels(klant: models.Klant):
+    klant.naam_sleutel = fonetisch(klant.achternaam) or None
+    klant.adres_sleutel = adres_sleutel(klant.postcode, klant.huisnummer) or None
+
+
+def vul_sleutels(engine) -> int:
+    """Online backfill van de sleutels voor bestaande klanten."""
+    from .backfill import backfill
+
+    tabel = models.Klant.__table__
+    return backfill(
+        engine, tabel,
+        bereken=lambda rij: {
+            "naam_sleutel": fonetisch(rij.achternaam) or None,
+            "adres_sleutel": adres_sleutel(rij.postcode, rij.huisnummer) or None,
+        },
+        kolommen=("achternaam", "postcode", "huisnummer"),
+    )
+
+
+# ======================
+# SCOREN
+# ======================
+
+GEWICHT_ACHTERNAAM = 0.5
+GEWICHT_VOORNAAM = 0.15
+GEWICHT_ADRES = 0.25
+GEWICHT_CONTACT = 0.2
+
+
+class Kenmerken(NamedTuple):
+    achternaam: str
+    voornaam: str
+    adres: str
+    email: str
+    telefoon: str
+
+
+def kenmerken(klant) -> Kenmerken:
+    """Eenmalig genormaliseerde velden, zodat de batchjob niet per paar normaliseert."""
+    return Kenmerken(
+        _normaliseer(klant.achternaam),
+        _normaliseer(klant.voornaam),
+        adres_sleutel(klant.postcode, klant.huisnummer),
+        (klant.email or "").strip().lower(),
+        (klant.telefoon or "").strip(),
+    )
+
+
+def _gelijkenis(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def _score(a: Kenmerken, b: Kenmerken, drempel: float = 0.0) -> float:
+    waarde = 0.0
+    if a.adres and a.adres == b.adres:
+        waarde += GEWICHT_ADRES
+    if (a.email and a.email == b.email) or (a.telefoon and a.telefoon == b.telefoon):
+        waarde += GEWICHT_CONTACT
+    # Ook met identieke namen haalt dit paar de drempel niet; sla de dure vergelijking over
+    if waarde + GEWICHT_ACHTERNAAM + GEWICHT_VOORNAAM < drempel:
+        return 0.0
+    waarde += GEWICHT_ACHTERNAAM * _gelijkenis(a.achternaam, b.achternaam)
+    waarde += GEWICHT_VOORNAAM * _gelijkenis(a.voornaam, b.voornaam)
+    return round(min(waarde, 1.0), 3)
+
+
+def score(a, b) -> float:
+    """Kans-achtige score (0-1) dat twee klanten dezelfde persoon zijn."""
+    return _score(kenmerken(a), kenmerken(b))
+
+
+def kandidaten(db: Session, klant, exclude_klant_id: Optional[int] = None) -> list[dict]:
+    """Bestaande klanten die op ``klant`` lijken, met score, hoogste eerst."""
+    naam = fonetisch(klant.achternaam)
+    nieuw = kenmerken(klant)
+    query = db.query(models.Klant)
+    if exclude_klant_id:
+        query = query.filter(models.Klant.id != exclude_klant_id)
+
+    # Het adresblok apart ophalen: een veelvoorkomende achternaam mag het niet verdringen
+    gevonden = {}
+    if nieuw.adres:
+        for bestaand in query.filter(models.Klant.adres_sleutel == nieuw.adres).limit(MAX_KANDIDATEN):
+            gevonden[bestaand.id] = bestaand
+    if naam:
+        # Binnen het naamblok eerst wie hetzelfde e-mailadres, telefoonnummer of PC4-gebied heeft
+        voorkeur = []
+        if nieuw.email:
+            voorkeur.append(func.lower(models.Klant.email) == nieuw.email)
+        if nieuw.telefoon:
+            voorkeur.append(models.Klant.telefoon == nieuw.telefoon)
+        pc4 = nieuw.adres[:4]
+        if pc4:
+            voorkeur.append(func.upper(func.replace(models.Klant.postcode, " ", "")).like(pc4 + "%"))
+        naam_query = query.filter(models.Klant.naam_sleutel == naam)
+        if voorkeur:
+            naam_query = naam_query.order_by(case((or_(*voorkeur), 0), else_=1), models.Klant.id)
+        for bestaand in naam_query.limit(MAX_KANDIDATEN):
+            gevonden.setdefault(bestaand.id, bestaand)
+
+    resultaat = []
+    for bestaand in gevonden.values():
+        s = _score(nieuw, kenmerken(bestaand), DREMPEL)
+        if s >= DREMPEL:
+            resultaat.append({"klant_id": bestaand.id, "klantnummer": bestaand.klantnummer,
+                              "naam": f"{bestaand.voornaam} {bestaand.achternaam}", "score": s})
+    return sorted(resultaat, key=lambda r: -r["score"])
+
+
+# ======================
+# BATCHJOB
+# ======================
+
+def vind_alle_duplicaten(db: Session, drempel: float = DREMPEL) -> list[dict]:
+    """Vergelijk klanten alleen binnen blokken met dezelfde sleutel."""
+    klanten = {}
+    blokken: dict[str, list[int]] = defaultdict(list)
+    kolommen = (models.Klant.id, models.Klant.voornaam, models.Klant.achternaam, models.Klant.postcode,
+                models.Klant.huisnummer, models.Klant.email, models.Klant.telefoon)
+    for rij in db.query(*kolommen).yield_per(5000):
+        k = klanten[rij.id] = kenmerken(rij)
+        if k.adres:
+            blokken["a:" + k.adres].append(rij.id)
+        naam = fonetisch(rij.achternaam)
+        if naam:
+            # Naamblok binnen PC4-gebied, anders worden veelvoorkomende namen één reuzenblok
+            blokken[f"n:{naam}|{(rij.postcode or '').replace(' ', '')[:4]}"].append(rij.id)
+        if k.email:
+            blokken["e:" + k.email].append(rij.id)
+        if k.telefoon:
+            blokken["t:" + k.telefoon].append(rij.id)
+
+    gezien = set()
+    paren = []
+    for ids in blokken.values():
+        if len(ids) < 2:
+            continue
+        ids = sorted(ids[:MAX_BLOK])
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                if (a, b) in gezien:
+                    continue
+                gezien.add((a, b))
+                s = _score(klanten[a], klanten[b], drempel)
+                if s >= drempel:
+                    paren.append({"klant_id": a, "duplicaat_id": b, "score": s})
+    return sorted(paren, key=lambda p: (-p["score"], p["klant_id"], p["duplicaat_id"]))
+
+
+# ======================
+# SAMENVOEGEN
+# ======================
+
+def voeg_samen(db: Session, behouden_id: int, duplicaat_id: int) -> Optional[dict]:
+    """Verplaats alle projecten van het duplicaat naar de behouden klant en verwijder het duplicaat."""
+    behouden = db.query(models.Klant).filter(models.Klant.id == behouden_id).first()
+    duplicaat = db.query(models.Klant).filter(models.Klant.id == duplicaat_id).first()
+    if behouden is None or duplicaat is None:
+        return None
+
+    if not rapportage.wijzig(db, duplicaat, {"verwijderd_op": datetime.utcnow()}, rapportage.klant_bijdragen):
+        db.rollback()
+        return None
+    projecten = db.query(models.Project).filter(models.Project.klant_id == duplicaat_id).all()
+    for project in projecten:
+        project.klant_id = behouden_id
+    db.commit()
+    return {"behouden_id": behouden_id, "duplicaat_id": duplicaat_id,
+            "verplaatste_projecten": [p.id for p in projecten]}
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    print(f"{vul_sleutels(engine)} klanten bijgewerkt")
@@ -0,0 +1,122 @@
+"""Health- en readiness-probes en het netjes afronden van uploads bij afsluiten.
+
+``/health`` zegt alleen dat het proces leeft. ``/ready`` controleert de database
+en de uploadmap, en geeft 503 zodra de worker aan het afsluiten is, zodat een
+load balancer geen nieuwe verzoeken meer stuurt terwijl lopende uploads afronden.
+"""
+import os
+import signal
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from . import opslag
+from .database import engine
+
+router = APIRouter(tags=["gezondheid"])
+
+# Maximale tijd (seconden) die een stoppende worker lopende uploads geeft
+GRACEFUL_TIMEOUT = float(os.getenv("ERP_GRACEFUL_TIMEOUT", "30"))
+
+_stopt = threading.Event()
+_uploads_lock = threading.Lock()
+_actieve_uploads = 0
+
+
+# ======================
+# UPLOADS BIJHOUDEN
+# ======================
+
+@contextmanager
+def upload_bezig():
+    global _actieve_uploads
+    with _uploads_lock:
+        _actieve_uploads += 1
+    try:
+        yield
+    finally:
+        with _uploads_lock:
+            _actieve_uploads -= 1
+
+
+def actieve_uploads() -> int:
+    return _actieve_uploads
+
+
+def wacht_op_uploads(timeout: float) -> bool:
+    """Wacht tot alle lopende uploads klaar zijn; geeft False terug als de timeout verstrijkt."""
+    einde = time.monotonic() + timeout
+    while actieve_uploads() and time.monotonic() < einde:
+        time.sleep(0.1)
+    return actieve_uploads() == 0
+
+
+# ======================
+# AFSLUITEN
+# ======================
+
+def markeer_stoppend():
+    _stopt.set()
+
+
+def vang_sigterm():
+    """Zet readiness op 503 zodra SIGTERM binnenkomt en geef het signaal daarna door aan de server."""
+    vorige = signal.getsignal(signal.SIGTERM)
+
+    def handler(signum, frame):
+        markeer_stoppend()
+        if callable(vorige):
+            vorige(signum, frame)
+
+    try:
+        signal.signal(signal.SIGTERM, handler)
+    except ValueError:
+        # Niet in de hoofdthread (bijv. in tests); afsluiten valt dan terug op de shutdown-hook
+        pass
+
+
+# ======================
+# PROBES
+# ======================
+
+def _controleer_database() -> str:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return "ok"
+    except Exception as e:
+        return f"fout: {e.__class__.__name__}"
+
+
+def _controleer_opslag() -> str:
+    try:
+        os.makedirs(opslag.UPLOAD_ROOT, exist_ok=True)
+        with tempfile.TemporaryFile(dir=opslag.UPLOAD_ROOT):
+            pass
+        return "ok"
+    except OSError as e:
+        return f"fout: {e.strerror or e.__class__.__name__}"
+
+
+@router.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    controles = {"database": _controleer_database(), "opslag": _controleer_opslag()}
+    klaar = not _stopt.is_set() and all(v == "ok" for v in controles.values())
+    return JSONResponse(
+        status_code=200 if klaar else 503,
+        content={
+            "status": "klaar" if klaar else ("stopt" if _stopt.is_set() else "niet klaar"),
+            "controles": controles,
+            "actieve_uploads": actieve_uploads(),
+        },
+    )
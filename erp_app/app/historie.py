@@ -0,0 +1,197 @@
+"""Soft delete en audit trail.
+
+Soft delete: klanten, taken en documenten krijgen bij verwijderen een
+``verwijderd_op``. Een ``do_orm_execute``-hook filtert die rijen uit elke ORM-query;
+met ``execution_options(inclusief_verwijderd=True)`` zijn ze weer zichtbaar.
+Klanten worden alleen uit directe queries gefilterd, zodat ``project.klant`` van
+een bestaand project blijft werken.
+
+Audit: na elke flush worden de gewijzigde velden verzameld; na de commit gaan ze
+naar een wachtrij die een achtergrondthread in batches naar ``audit_log`` schrijft.
+De mutatie zelf wacht dus nooit op de audit-insert.
+"""
+import atexit
+import enum
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+SOFT_DELETE_MODELLEN = (models.Taak, models.Document)
+GEAUDITEERD = (models.Klant, models.Project, models.Taak, models.Afspraak, models.DocumentMap, models.Document)
+
+BATCH_GROOTTE = 500
+SCHRIJF_INTERVAL = 1.0  # seconden
+
+
+# ======================
+# SOFT DELETE
+# ======================
+
+def markeer_verwijderd(obj):
+    obj.verwijderd_op = datetime.utcnow()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _filter_verwijderd(state):
+    if not state.is_select or state.execution_options.get("inclusief_verwijderd", False):
+        return
+    opties = [
+        with_loader_criteria(model, lambda cls: cls.verwijderd_op.is_(None), include_aliases=True)
+        for model in SOFT_DELETE_MODELLEN
+    ]
+    if not state.is_relationship_load:
+        # Niet doorgeven aan relatie-loads: een project van een verwijderde klant houdt zijn klant
+        opties.append(with_loader_criteria(
+            models.Klant, lambda cls: cls.verwijderd_op.is_(None),
+            include_aliases=True, propagate_to_loaders=False,
+        ))
+    state.statement = state.statement.options(*opties)
+
+
+# ======================
+# AUDIT: VERZAMELEN
+# ======================
+
+def _json(waarde):
+    if isinstance(waarde, enum.Enum):
+        return waarde.value
+    if isinstance(waarde, (date, datetime)):
+        return waarde.isoformat()
+    return waarde
+
+
+def _wijzigingen(obj, nieuw: bool) -> dict:
+    verschil = {}
+    for attr in inspect(obj).mapper.column_attrs:
+        historie = inspect(obj).attrs[attr.key].history
+        if nieuw:
+            waarde = getattr(obj, attr.key)
+            if waarde is not None:
+                verschil[attr.key] = [None, _json(waarde)]
+        elif historie.has_changes():
+            oud = historie.deleted[0] if historie.deleted else None
+            nieuw_waarde = historie.added[0] if historie.added else None
+            verschil[attr.key] = [_json(oud), _json(nieuw_waarde)]
+    return verschil
+
+
+def _actie(obj, verschil: dict, nieuw: bool) -> str:
+    if nieuw:
+        return "aangemaakt"
+    if "verwijderd_op" in verschil and verschil["verwijderd_op"][0] is None:
+        return "verwijderd"
+    return "gewijzigd"
+
+
+@event.listens_for(Session, "after_flush")
+def _verzamel(session, flush_context):
+    regels = session.info.setdefault("audit", [])
+    nu = datetime.utcnow()
+    for obj, nieuw in [(o, True) for o in session.new] + [(o, False) for o in session.dirty]:
+        if not isinstance(obj, GEAUDITEERD):
+            continue
+        verschil = _wijzigingen(obj, nieuw)
+        if not verschil:
+            continue
+        regels.append({
+            "tabel": obj.__tablename__, "rij_id": obj.id, "actie": _actie(obj, verschil, nieuw),
+            "wijzigingen": json.dumps(verschil, default=str), "tijdstip": nu,
+        })
+    for obj in session.deleted:
+        if isinstance(obj, GEAUDITEERD):
+            regels.append({
+                "tabel": obj.__tablename__, "rij_id": obj.id, "actie": "gewist",
+                "wijzigingen": None, "tijdstip": nu,
+            })
+
+
+@event.listens_for(Session, "after_commit")
+def _na_commit(session):
+    regels = session.info.pop("audit", None)
+    if regels:
+        schrijver.voeg_toe(regels)
+
+
+@event.listens_for(Session, "after_rollback")
+def _na_rollback(session):
+    session.info.pop("audit", None)
+
+
+# ======================
+# AUDIT: SCHRIJVEN
+# ======================
+
+class AuditSchrijver:
+    """Schrijft audit-regels in batches vanuit een achtergrondthread."""
+
+    def __init__(self):
+        self._wachtrij: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def voeg_toe(self, regels: list[dict]):
+        self._start()
+        for regel in regels:
+            self._wachtrij.put(regel)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="audit-schrijver", daemon=True)
+                self._thread.start()
+
+    def _batch(self, eerste_timeout: Optional[float]) -> list[dict]:
+        try:
+            batch = [self._wachtrij.get(timeout=eerste_timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < BATCH_GROOTTE:
+            try:
+                batch.append(self._wachtrij.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._batch(eerste_timeout=None)
+            self._schrijf(batch)
+            # Bij een volle batch staat er meer klaar; anders even wachten zodat
+            # rustige periodes toch in grotere batches worden geschreven
+            if len(batch) < BATCH_GROOTTE:
+                time.sleep(SCHRIJF_INTERVAL)
+
+    def _schrijf(self, batch: list[dict]):
+        if not batch:
+            return
+        from .database import engine
+        try:
+            with engine.begin() as conn:
+                conn.execute(models.AuditLog.__table__.insert(), batch)
+        except Exception:
+            logger.exception("Audit-batch van %d regels kon niet worden geschreven", len(batch))
+        finally:
+            for _ in batch:
+                self._wachtrij.task_done()
+
+    def leeg(self):
+        """Schrijf alles wat nog in de wachtrij staat (bij afsluiten of in scripts)."""
+        while batch := self._batch(eerste_timeout=0):
+            self._schrijf(batch)
+
+
+schrijver = AuditSchrijver()
+atexit.register(schrijver.leeg)
@@ -1,42 +1,65 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
 
-from . import models, schemas, crud
-from .database import SessionLocal, engine
-
-models.Base.metadata.create_all(bind=engine)
+from . import models, schemas, crud, opslag, ratelimit, gezondheid, historie, dedupe, sqlprofiel, migraties
+from .database import get_db, get_read_db, prewarm_pool, start_snapshot_replica
+from .routes import rapportage, planning, documenten, duplicaten, debug
+from .routes import opslag as opslag_routes
 
 app = FastAPI()
-
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+app.add_middleware(ratelimit.RateLimitMiddleware)
+app.add_middleware(sqlprofiel.SqlProfielMiddleware)
+app.include_router(rapportage.router)
+app.include_router(planning.router)
+app.include_router(opslag_routes.router)
+app.include_router(documenten.router)
+app.include_router(gezondheid.router)
+app.include_router(duplicaten.router)
+app.include_router(debug.router)
+
+@app.on_event("startup")
+def start_worker():
+    # app.server werkt het schema eenmalig bij voordat de workers starten
+    if not os.getenv("ERP_SCHEMA_GEREED"):
+        migraties.bijwerken()
+    prewarm_pool()
+    start_snapshot_replica()
+    gezondheid.vang_sigterm()
+
+@app.on_event("shutdown")
+def stop_worker():
+    gezondheid.markeer_stoppend()
+    gezondheid.wacht_op_uploads(gezondheid.GRACEFUL_TIMEOUT)
+    historie.schrijver.leeg()
 
 # ======================
 # KLANT ROUTES
 # ======================
 
-@app.post("/klanten/", response_model=schemas.KlantOut)
-def create_klant(klant: schemas.KlantCreate, db: Session = Depends(get_db)):
-    return crud.create_klant(db, klant)
+@app.post("/klanten/", response_model=schemas.KlantAangemaakt)
+def create_klant(klant: schemas.KlantCreate, negeer_duplicaten: bool = False, db: Session = Depends(get_db)):
+    # negeer_duplicaten slaat het scoren over, bijv. bij bulkimports
+    kandidaten = [] if negeer_duplicaten else dedupe.kandidaten(db, klant)
+    db_klant = crud.create_klant(db, klant)
+    return {**schemas.KlantOut.model_validate(db_klant).model_dump(), "mogelijke_duplicaten": kandidaten}
 
 @app.get("/klanten/", response_model=List[schemas.KlantOut])
-def get_klanten(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_klanten(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=crud.MAX_PAGINA_GROOTTE),
+    db: Session = Depends(get_read_db),
+):
     return crud.get_klanten(db, skip=skip, limit=limit)
 
 @app.get("/klanten/zoek/", response_model=List[schemas.KlantOut])
-def zoek_klanten(zoekterm: str, db: Session = Depends(get_db)):
+def zoek_klanten(zoekterm: str, db: Session = Depends(get_read_db)):
     return crud.zoek_klanten(db, zoekterm)
 
 @app.get("/klanten/{klant_id}", response_model=schemas.KlantOut)
-def get_klant(klant_id: int, db: Session = Depends(get_db)):
+def get_klant(klant_id: int, db: Session = Depends(get_read_db)):
     klant = crud.get_klant(db, klant_id)
     if klant is None:
         raise HTTPException(status_code=404, detail="Klant niet gevonden")
@@ -65,11 +88,15 @@ def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)
     return crud.create_project(db, project)
 
 @app.get("/projecten/", response_model=List[schemas.ProjectOut])
-def get_projecten(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_projecten(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=crud.MAX_PAGINA_GROOTTE),
+    db: Session = Depends(get_read_db),
+):
     return crud.get_projecten(db, skip=skip, limit=limit)
 
 @app.get("/projecten/{project_id}", response_model=schemas.ProjectOut)
-def get_project(project_id: int, db: Session = Depends(get_db)):
+def get_project(project_id: int, db: Session = Depends(get_read_db)):
     project = crud.get_project(db, project_id)
     if project is None:
         raise HTTPException(status_code=404, detail="Project niet gevonden")
@@ -106,7 +133,7 @@ def create_map(project_id: int, map_data: schemas.DocumentMapCreate, db: Session
     return crud.create_document_map(db, project_id, map_data)
 
 @app.get("/projecten/{project_id}/mappen", response_model=List[schemas.DocumentMapOut])
-def get_mappen(project_id: int, db: Session = Depends(get_db)):
+def get_mappen(project_id: int, db: Session = Depends(get_read_db)):
     return crud.get_document_mappen(db, project_id)
 
 @app.put("/mappen/{map_id}", response_model=schemas.DocumentMapOut)
@@ -127,23 +154,19 @@ def delete_map(map_id: int, db: Session = Depends(get_db)):
 # DOCUMENT UPLOAD/DOWNLOAD ROUTES
 # ======================
 
-UPLOAD_DIR = "uploads/projecten"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 @app.post("/documenten/upload/")
 def upload_document(
     project_id: int = Form(...),
     map_id: Optional[int] = Form(None),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
 ):
     filename = file.filename
-    project_folder = os.path.join(UPLOAD_DIR, f"project_{project_id}")
-    os.makedirs(project_folder, exist_ok=True)
-
-    filepath = os.path.join(project_folder, filename)
-
-    with open(filepath, "wb") as buffer:
-        buffer.write(file.file.read())
+    try:
+        with gezondheid.upload_bezig():
+            filepath = opslag.bewaar(file.file, project_id, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     document_create = schemas.DocumentCreate(
         bestandsnaam=filename,
@@ -151,11 +174,7 @@ def upload_document(
         map_id=map_id,
         project_id=project_id
     )
-    db = SessionLocal()
-    try:
-        crud.upload_document(db, document_create)
-    finally:
-        db.close()
+    crud.upload_document(db, document_create)
 
     return {
         "message": "Bestand succesvol geüpload",
@@ -166,7 +185,7 @@ def upload_document(
 
 @app.get("/documenten/download/{project_id}/{bestandsnaam}")
 def download_document(project_id: int, bestandsnaam: str):
-    filepath = os.path.join(UPLOAD_DIR, f"project_{project_id}", bestandsnaam)
-    if not os.path.exists(filepath):
+    filepath = opslag.lokaliseer(os.path.join(opslag.project_map(project_id), os.path.basename(bestandsnaam)))
+    if filepath is None:
         raise HTTPException(status_code=404, detail="Bestand niet gevonden")
     return FileResponse(filepath, filename=bestandsnaam)
@@ -0,0 +1,33 @@
+"""Schema bijwerken bij het starten van de server.
+
+De Alembic-migraties zijn leidend. Een lege database wordt in één keer met
+``create_all`` aangemaakt en daarna op ``head`` gestempeld; een bestaande
+database gaat via ``alembic upgrade head``. ``create_all`` op een bestaande
+database zou alleen ontbrekende tabellen toevoegen en geen kolommen.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from . import models
+from .database import engine
+
+SCRIPT_LOCATION = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "alembic"))
+
+
+def _config() -> Config:
+    # Zonder ini-bestand: env.py laat de logging-configuratie van de server dan ongemoeid
+    config = Config()
+    config.set_main_option("script_location", SCRIPT_LOCATION)
+    return config
+
+
+def bijwerken():
+    """Breng de database naar de laatste migratie."""
+    if not inspect(engine).get_table_names():
+        models.Base.metadata.create_all(bind=engine)
+        command.stamp(_config(), "head")
+    else:
+        command.upgrade(_config(), "head")
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Enum, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Enum, Text, DateTime, Float, UniqueConstraint, Index, text
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime, date
 import enum
 
 Base = declarative_base()
 
+# Partiële indexen bevatten alleen rijen die niet (soft) verwijderd zijn
+ACTIEF = text("verwijderd_op IS NULL")
+
+
+def actief_index(naam: str, *kolommen: str, unique: bool = False) -> Index:
+    return Index(naam, *kolommen, unique=unique, sqlite_where=ACTIEF, postgresql_where=ACTIEF)
+
 # =====================
 # ENUMS
 # =====================
@@ -30,6 +37,11 @@ class TaakStatusEnum(str, enum.Enum):
 
 class Klant(Base):
     __tablename__ = "klanten"
+    __table_args__ = (
+        # E-mail en klantnummer zijn alleen uniek onder actieve klanten
+        actief_index("uq_klanten_email_actief", "email", unique=True),
+        actief_index("uq_klanten_klantnummer_actief", "klantnummer", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     voornaam = Column(String, index=True)
@@ -38,11 +50,16 @@ class Klant(Base):
     huisnummer = Column(String)
     postcode = Column(String, index=True)
     woonplaats = Column(String)
-    email = Column(String, unique=True, index=True)
+    email = Column(String, index=True)
     telefoon = Column(String)
-    klantnummer = Column(String, unique=True, index=True)
+    klantnummer = Column(String, index=True)
     registratiedatum = Column(Date, default=date.today)
     klanttype = Column(Enum(KlantTypeEnum))
+    verwijderd_op = Column(DateTime, nullable=True)
+
+    # Blokkeersleutels voor duplicaatdetectie (zie dedupe.py)
+    naam_sleutel = Column(String, index=True)
+    adres_sleutel = Column(String, index=True)
 
 
 # =====================
@@ -51,16 +68,19 @@ class Klant(Base):
 
 class Project(Base):
     __tablename__ = "projecten"
+    __table_args__ = (
+        Index("ix_projecten_status_startdatum", "status", "startdatum"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     projectnaam = Column(String, index=True)
-    klant_id = Column(Integer, ForeignKey("klanten.id"))
+    klant_id = Column(Integer, ForeignKey("klanten.id"), index=True)
     omschrijving = Column(Text)
     straat = Column(String)
     postcode = Column(String)
     woonplaats = Column(String)
     status = Column(Enum(ProjectStatusEnum), default="ingepland")
-    startdatum = Column(Date)
+    startdatum = Column(Date, index=True)
     einddatum = Column(Date)
     installateurs = Column(String)
     aangemaakt_op = Column(DateTime, default=datetime.utcnow)
@@ -79,6 +99,10 @@ class Project(Base):
 
 class Taak(Base):
     __tablename__ = "taken"
+    __table_args__ = (
+        Index("ix_taken_datum_uitvoerder", "datum", "uitvoerder"),
+        actief_index("ix_taken_actief_project_id", "project_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     titel = Column(String)
@@ -86,8 +110,9 @@ class Taak(Base):
     uitvoerder = Column(String)
     kleur = Column(String)  # HEX-kleurcode zoals "#FF0000"
     datum = Column(Date)
+    verwijderd_op = Column(DateTime, nullable=True)
 
-    project_id = Column(Integer, ForeignKey("projecten.id"))
+    project_id = Column(Integer, ForeignKey("projecten.id"), index=True)
     project = relationship("Project", back_populates="taken")
 
 
@@ -103,7 +128,7 @@ class Afspraak(Base):
     datum = Column(Date)
     notities = Column(Text)
 
-    project_id = Column(Integer, ForeignKey("projecten.id"))
+    project_id = Column(Integer, ForeignKey("projecten.id"), index=True)
     project = relationship("Project", back_populates="afspraken")
 
 
@@ -117,20 +142,60 @@ class DocumentMap(Base):
     id = Column(Integer, primary_key=True, index=True)
     naam = Column(String)
 
-    project_id = Column(Integer, ForeignKey("projecten.id"))
+    project_id = Column(Integer, ForeignKey("projecten.id"), index=True)
     project = relationship("Project", back_populates="mappen")
     documenten = relationship("Document", back_populates="map", cascade="all, delete-orphan")
 
 
 class Document(Base):
     __tablename__ = "documenten"
+    __table_args__ = (
+        actief_index("ix_documenten_actief_project_id", "project_id"),
+        actief_index("ix_documenten_actief_map_id", "map_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     bestandsnaam = Column(String)
-    pad = Column(String)
+    pad = Column(String, index=True)
+    verwijderd_op = Column(DateTime, nullable=True)
 
-    project_id = Column(Integer, ForeignKey("projecten.id"))
-    map_id = Column(Integer, ForeignKey("documentmappen.id"))
+    project_id = Column(Integer, ForeignKey("projecten.id"), index=True)
+    map_id = Column(Integer, ForeignKey("documentmappen.id"), index=True)
 
     project = relationship("Project", back_populates="documenten")
     map = relationship("DocumentMap", back_populates="documenten")
+
+
+# =====================
+# RAPPORTAGE
+# =====================
+
+class RapportRollup(Base):
+    """Voorgeaggregeerde teller per rapport en sleutel (zie rapportage.py)."""
+    __tablename__ = "rapport_rollups"
+    __table_args__ = (UniqueConstraint("rapport", "sleutel", name="uq_rapport_sleutel"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    rapport = Column(String, nullable=False)
+    sleutel = Column(String, nullable=False)
+    aantal = Column(Integer, nullable=False, default=0)
+    totaal = Column(Float, nullable=False, default=0.0)
+
+
+# =====================
+# AUDIT
+# =====================
+
+class AuditLog(Base):
+    """Append-only historie van wijzigingen per veld (geschreven door historie.py)."""
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_tabel_rij", "tabel", "rij_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tabel = Column(String, nullable=False)
+    rij_id = Column(Integer, nullable=False)
+    actie = Column(String, nullable=False)  # aangemaakt / gewijzigd / verwijderd
+    wijzigingen = Column(Text)  # JSON: {"veld": [oud, nieuw]}
+    tijdstip = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,324 @@
+"""Opslaglaag voor geüploade documenten.
+
+Warme bestanden staan onder ``UPLOAD_ROOT/projecten/project_X/[map/]``. Documenten
+van afgeronde projecten worden naar ``UPLOAD_ROOT/koud/`` verplaatst (gecomprimeerd
+waar dat zin heeft) en bij de eerste toegang teruggezet. Een bestand blijft bestaan
+zolang er een ``Document``-rij naar verwijst; ``ruim_op`` verwijdert de rest.
+Opruimen en archiveren kunnen als geplande job draaien: ``python -m app.opslag``.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models
+
+UPLOAD_ROOT = os.getenv("UPLOAD_ROOT", "uploads")
+WARM_DIR = os.path.join(UPLOAD_ROOT, "projecten")
+KOUD_DIR = os.path.join(UPLOAD_ROOT, "koud")
+
+# Bestanden jonger dan dit (seconden) worden niet opgeruimd, zodat lopende uploads veilig zijn
+GC_MIN_LEEFTIJD = int(os.getenv("OPSLAG_GC_MIN_LEEFTIJD", "3600"))
+
+# Deze formaten zijn al gecomprimeerd; die worden alleen verplaatst
+GECOMPRIMEERD = {".zip", ".gz", ".7z", ".rar", ".jpg", ".jpeg", ".png", ".gif", ".webp",
+                 ".mp4", ".mov", ".pdf", ".docx", ".xlsx", ".pptx", ".heic"}
+
+CHUNK = 1024 * 1024
+
+# Verplaatsen tussen warm en koud gebeurt onder een lockbestand (ook tussen workers)
+LOCK_WACHTTIJD = 60  # seconden
+LOCK_VERLOPEN = 300  # een oudere lock is van een afgebroken proces
+
+
+def _veilige_naam(naam: str) -> str:
+    naam = os.path.basename((naam or "").replace("\\", "/"))
+    if naam in ("", ".", ".."):
+        raise ValueError(f"Ongeldige bestandsnaam: '{naam}'")
+    return naam
+
+
+def project_map(project_id: int, submap: Optional[str] = None) -> str:
+    pad = os.path.join(WARM_DIR, f"project_{project_id}")
+    if submap:
+        pad = os.path.join(pad, _veilige_naam(submap))
+    return pad
+
+
+def bewaar(bron: BinaryIO, project_id: int, bestandsnaam: str, submap: Optional[str] = None) -> str:
+    """Schrijf een upload in blokken naar de warme opslag en geef het pad terug."""
+    doelmap = project_map(project_id, submap)
+    os.makedirs(doelmap, exist_ok=True)
+    pad = os.path.join(doelmap, _veilige_naam(bestandsnaam))
+
+    # Eerst naar een tijdelijk bestand, zodat een afgebroken upload nooit een half bestand achterlaat
+    fd, tmp = tempfile.mkstemp(dir=doelmap, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            shutil.copyfileobj(bron, buffer, CHUNK)
+        os.replace(tmp, pad)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return pad
+
+
+# ======================
+# WARM / KOUD
+# ======================
+
+def is_gecomprimeerd(pad: str) -> bool:
+    return os.path.splitext(pad)[1].lower() in GECOMPRIMEERD
+
+
+def koud_pad(pad: str) -> Optional[str]:
+    """Pad in koude opslag, of None voor bestanden buiten de warme opslag (oude uploads)."""
+    relatief = os.path.relpath(os.path.abspath(pad), os.path.abspath(WARM_DIR))
+    if relatief.startswith(os.pardir):
+        return None
+    koud = os.path.join(KOUD_DIR, relatief)
+    return koud if is_gecomprimeerd(pad) else koud + ".gz"
+
+
+@contextmanager
+def _bestandslock(pad: str):
+    lock = pad + ".lock"
+    os.makedirs(os.path.dirname(lock), exist_ok=True)
+    einde = time.monotonic() + LOCK_WACHTTIJD
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > LOCK_VERLOPEN:
+                    os.remove(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > einde:
+                raise TimeoutError(f"Bestand is vergrendeld: {pad}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock)
+
+
+def _schrijf_via_tmp(bron: BinaryIO, pad: str, prefix: str, comprimeer: bool = False):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(pad), prefix=prefix)
+    try:
+        with os.fdopen(fd, "wb") as uit:
+            if comprimeer:
+                with gzip.GzipFile(fileobj=uit, mode="wb", compresslevel=6) as gz:
+                    shutil.copyfileobj(bron, gz, CHUNK)
+            else:
+                shutil.copyfileobj(bron, uit, CHUNK)
+        os.replace(tmp, pad)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def archiveer_bestand(pad: str) -> int:
+    """Verplaats een warm bestand naar koude opslag; geeft het aantal bespaarde bytes terug."""
+    doel = koud_pad(pad)
+    with _bestandslock(doel):
+        if not os.path.exists(pad):
+            return 0
+        os.makedirs(os.path.dirname(doel), exist_ok=True)
+        grootte = os.path.getsize(pad)
+        if doel.endswith(".gz") and not is_gecomprimeerd(pad):
+            with open(pad, "rb") as bron:
+                _schrijf_via_tmp(bron, doel, ".archief-", comprimeer=True)
+            os.remove(pad)
+        else:
+            shutil.move(pad, doel)
+        return grootte - os.path.getsize(doel)
+
+
+def herstel_bestand(pad: str) -> bool:
+    """Zet een bestand terug uit koude opslag; False als het daar niet (meer) staat."""
+    bron = koud_pad(pad)
+    with _bestandslock(bron):
+        # Een gelijktijdig verzoek kan het bestand al hebben teruggezet
+        if os.path.exists(pad):
+            return True
+        if not os.path.exists(bron):
+            return False
+        os.makedirs(os.path.dirname(pad), exist_ok=True)
+        if bron.endswith(".gz") and not is_gecomprimeerd(pad):
+            with gzip.open(bron, "rb") as gz:
+                _schrijf_via_tmp(gz, pad, ".herstel-")
+            os.remove(bron)
+        else:
+            shutil.move(bron, pad)
+        return True
+
+
+def lokaliseer(pad: Optional[str]) -> Optional[str]:
+    """Geef het warme pad van een document terug en haal het zo nodig uit koude opslag."""
+    if not pad:
+        return None
+    if os.path.exists(pad):
+        return pad
+    koud = koud_pad(pad)
+    if koud and os.path.exists(koud) and herstel_bestand(pad):
+        return pad
+    return pad if os.path.exists(pad) else None
+
+
+def open_bestand(pad: Optional[str]) -> Optional[BinaryIO]:
+    """Open een document om te lezen zonder het uit koude opslag terug te zetten."""
+    if not pad:
+        return None
+    if os.path.exists(pad):
+        return open(pad, "rb")
+    koud = koud_pad(pad)
+    if koud and os.path.exists(koud):
+        try:
+            return gzip.open(koud, "rb") if koud.endswith(".gz") and not is_gecomprimeerd(pad) else open(koud, "rb")
+        except FileNotFoundError:
+            # Intussen door een ander verzoek teruggezet
+            pass
+    return open(pad, "rb") if os.path.exists(pad) else None
+
+
+def archiveer_afgeronde_projecten(db: Session) -> dict:
+    projecten = [
+        project_id for (project_id,) in
+        db.query(models.Project.id).filter(models.Project.status == models.ProjectStatusEnum.afgerond)
+    ]
+    bestanden, bespaard = 0, 0
+    for project_id in projecten:
+        for pad in _bestanden_onder(project_map(project_id)):
+            bespaard += archiveer_bestand(pad)
+            bestanden += 1
+    return {"projecten": len(projecten), "bestanden": bestanden, "bespaard_bytes": bespaard}
+
+
+# ======================
+# REFERENTIES EN OPRUIMEN
+# ======================
+
+def _sleutel(pad: str) -> str:
+    return os.path.normcase(os.path.abspath(pad))
+
+
+def _is_tijdelijk(naam: str) -> bool:
+    return naam.startswith((".upload-", ".herstel-", ".archief-")) or naam.endswith((".tmp", ".herstel", ".lock"))
+
+
+def _bestanden_onder(map_pad: str, tijdelijk: bool = False):
+    for root, _, bestanden in os.walk(map_pad):
+        for naam in bestanden:
+            if tijdelijk or not _is_tijdelijk(naam):
+                yield os.path.join(root, naam)
+
+
+def referenties(db: Session, pad: str) -> int:
+    # Soft-deleted documenten tellen mee: zonder bestand zijn ze niet meer te herstellen
+    return (
+        db.query(func.count(models.Document.id))
+        .filter(models.Document.pad == pad)
+        .execution_options(inclusief_verwijderd=True)
+        .scalar()
+    )
+
+
+def verwijder_als_wees(db: Session, pad: Optional[str]) -> bool:
+    """Verwijder een bestand (warm en koud) als geen enkel document er nog naar verwijst."""
+    if not pad or referenties(db, pad):
+        return False
+    verwijderd = False
+    for kandidaat in (pad, koud_pad(pad)):
+        if kandidaat and os.path.exists(kandidaat):
+            os.remove(kandidaat)
+            verwijderd = True
+    return verwijderd
+
+
+def ruim_op(db: Session, droog: bool = False) -> dict:
+    """Verwijder bestanden in warme en koude opslag waar geen document naar verwijst."""
+    in_gebruik = set()
+    paden = (
+        db.query(models.Document.pad)
+        .filter(models.Document.pad.isnot(None))
+        .execution_options(inclusief_verwijderd=True)
+        .yield_per(1000)
+    )
+    for (pad,) in paden:
+        in_gebruik.add(_sleutel(pad))
+        koud = koud_pad(pad)
+        if koud:
+            in_gebruik.add(_sleutel(koud))
+
+    grens = time.time() - GC_MIN_LEEFTIJD
+    verwijderd, vrijgemaakt = [], 0
+    for basis in (WARM_DIR, KOUD_DIR):
+        # Achtergebleven tijdelijke bestanden van afgebroken uploads tellen hier ook mee
+        for pad in _bestanden_onder(basis, tijdelijk=True):
+            if _sleutel(pad) in in_gebruik or os.path.getmtime(pad) > grens:
+                continue
+            vrijgemaakt += os.path.getsize(pad)
+            verwijderd.append(pad)
+            if not droog:
+                os.remove(pad)
+        if not droog:
+            _verwijder_lege_mappen(basis)
+    return {"verwijderd": verwijderd, "vrijgemaakt_bytes": vrijgemaakt, "droog": droog}
+
+
+def _verwijder_lege_mappen(basis: str):
+    for root, mappen, bestanden in os.walk(basis, topdown=False):
+        if root != basis and not mappen and not bestanden:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+# ======================
+# GEBRUIK
+# ======================
+
+def _project_id_uit_map(naam: str) -> Optional[int]:
+    if naam.startswith("project_") and naam[len("project_"):].isdigit():
+        return int(naam[len("project_"):])
+    return None
+
+
+def gebruik_per_project() -> list[dict]:
+    gebruik: dict[int, dict] = {}
+    for soort, basis in (("warm_bytes", WARM_DIR), ("koud_bytes", KOUD_DIR)):
+        if not os.path.isdir(basis):
+            continue
+        for naam in os.listdir(basis):
+            project_id = _project_id_uit_map(naam)
+            if project_id is None:
+                continue
+            regel = gebruik.setdefault(project_id, {"project_id": project_id, "warm_bytes": 0, "koud_bytes": 0, "bestanden": 0})
+            for pad in _bestanden_onder(os.path.join(basis, naam)):
+                regel[soort] += os.path.getsize(pad)
+                regel["bestanden"] += 1
+    return [gebruik[k] for k in sorted(gebruik)]
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(ruim_op(db))
+        print(archiveer_afgeronde_projecten(db))
+    finally:
+        db.close()
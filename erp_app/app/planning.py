@@ -0,0 +1,232 @@
+"""Offline dagplanning voor installateurs.
+
+Postcodes worden lokaal gegeocodeerd met een tabel van PC4/PC6-centroïden
+(standaard ``data/pc4_centroiden.csv``; een andere tabel kan via
+``PLANNING_POSTCODE_BESTAND`` worden ingesteld). De meegeleverde tabel bevat
+alleen de grote plaatsen; genereer de volledige tabel uit de open CBS-data met
+``python scripts/pc4_centroiden.py``. Postcodes die niet in de tabel staan
+komen in ``zonder_locatie``: een geschatte plek zou de routes verstoren.
+Per uitvoerder wordt een afstandsmatrix opgebouwd en een route bepaald met
+nearest neighbour gevolgd door 2-opt.
+"""
+import csv
+import math
+import os
+import time
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+POSTCODE_BESTAND = os.getenv(
+    "PLANNING_POSTCODE_BESTAND",
+    os.path.join(os.path.dirname(__file__), "data", "pc4_centroiden.csv"),
+)
+DEPOT_POSTCODE = os.getenv("PLANNING_DEPOT_POSTCODE")
+MAX_REKENTIJD = float(os.getenv("PLANNING_MAX_REKENTIJD", "0.5"))  # seconden voor 2-opt per dag
+
+NIET_TOEGEWEZEN = "niet_toegewezen"
+
+
+class Stop(NamedTuple):
+    taak_id: int
+    project_id: Optional[int]
+    titel: str
+    postcode: str
+    lat: float
+    lon: float
+
+
+# ======================
+# GEOCODERING
+# ======================
+
+def normaliseer_postcode(postcode: Optional[str]) -> str:
+    return (postcode or "").replace(" ", "").upper()
+
+
+class PostcodeGeocoder:
+    def __init__(self, pad: str):
+        self.centroiden: dict[str, tuple[float, float]] = {}
+        with open(pad, newline="", encoding="utf-8") as f:
+            for rij in csv.DictReader(f):
+                self.centroiden[normaliseer_postcode(rij["postcode"])] = (float(rij["lat"]), float(rij["lon"]))
+
+    def locatie(self, postcode: Optional[str]) -> Optional[tuple[float, float]]:
+        pc = normaliseer_postcode(postcode)
+        if pc in self.centroiden:
+            return self.centroiden[pc]
+        # Onbekende PC4 niet naar een "nabij" nummer afronden: 4301 en 3811 liggen ver uiteen
+        return self.centroiden.get(pc[:4])
+
+
+@lru_cache(maxsize=1)
+def get_geocoder() -> PostcodeGeocoder:
+    return PostcodeGeocoder(POSTCODE_BESTAND)
+
+
+# ======================
+# AFSTANDEN EN ROUTES
+# ======================
+
+def afstand_km(a: tuple[float, float], b: tuple[float, float]) -> float:
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 12742.0 * math.asin(math.sqrt(h))
+
+
+def afstandsmatrix(punten: list[tuple[float, float]]) -> list[list[float]]:
+    # Haversine met radialen en cos(lat) vooraf berekend; dit is de binnenste lus bij 500 stops
+    n = len(punten)
+    rad = [(math.radians(lat), math.radians(lon)) for lat, lon in punten]
+    cos_lat = [math.cos(lat) for lat, _ in rad]
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        lat1, lon1 = rad[i]
+        cos1 = cos_lat[i]
+        rij = matrix[i]
+        for j in range(i + 1, n):
+            lat2, lon2 = rad[j]
+            h = sin((lat2 - lat1) / 2) ** 2 + cos1 * cos_lat[j] * sin((lon2 - lon1) / 2) ** 2
+            rij[j] = matrix[j][i] = 12742.0 * asin(sqrt(h))
+    return matrix
+
+
+def nearest_neighbour(matrix: list[list[float]], start: int) -> list[int]:
+    onbezocht = set(range(len(matrix)))
+    onbezocht.discard(start)
+    route = [start]
+    while onbezocht:
+        rij = matrix[route[-1]]
+        volgende = min(onbezocht, key=rij.__getitem__)
+        onbezocht.remove(volgende)
+        route.append(volgende)
+    return route
+
+
+def twee_opt(route: list[int], matrix: list[list[float]], deadline: float) -> list[int]:
+    """Verbeter een open route (vast beginpunt) tot geen omkering meer winst geeft of de deadline verstrijkt."""
+    n = len(route)
+    verbeterd = True
+    while verbeterd and time.perf_counter() < deadline:
+        verbeterd = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            rij_a, rij_b = matrix[a], matrix[b]
+            for j in range(i + 1, n):
+                c = route[j]
+                if j + 1 < n:
+                    e = route[j + 1]
+                    delta = rij_a[c] + rij_b[e] - rij_a[b] - matrix[c][e]
+                else:
+                    delta = rij_a[c] - rij_a[b]
+                if delta < -1e-9:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    b = route[i]
+                    rij_b = matrix[b]
+                    verbeterd = True
+            if time.perf_counter() >= deadline:
+                break
+    return route
+
+
+def routelengte(route: list[int], matrix: list[list[float]]) -> float:
+    return sum(matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+def plan_route(stops: list[Stop], depot: Optional[tuple[float, float]], deadline: float) -> tuple[list[Stop], float]:
+    if not stops:
+        return [], 0.0
+    punten = [(s.lat, s.lon) for s in stops]
+    if depot:
+        punten.insert(0, depot)
+        start = 0
+    else:
+        # Zonder depot beginnen we bij de buitenste stop, zodat de route niet heen en weer loopt
+        midden = (sum(p[0] for p in punten) / len(punten), sum(p[1] for p in punten) / len(punten))
+        start = max(range(len(punten)), key=lambda i: afstand_km(punten[i], midden))
+        punten[0], punten[start] = punten[start], punten[0]
+        stops = list(stops)
+        stops[0], stops[start] = stops[start], stops[0]
+        start = 0
+
+    matrix = afstandsmatrix(punten)
+    route = twee_opt(nearest_neighbour(matrix, start), matrix, deadline)
+    lengte = routelengte(route, matrix)
+    if depot:
+        route = [i - 1 for i in route[1:]]
+    return [stops[i] for i in route], lengte
+
+
+# ======================
+# DAGPLANNING
+# ======================
+
+def _zwaartepunt(stops: list[Stop]) -> tuple[float, float]:
+    return (sum(s.lat for s in stops) / len(stops), sum(s.lon for s in stops) / len(stops))
+
+
+def plan_dag(db: Session, datum: date) -> dict:
+    begin = time.perf_counter()
+    geocoder = get_geocoder()
+    depot = geocoder.locatie(DEPOT_POSTCODE) if DEPOT_POSTCODE else None
+
+    rijen = (
+        db.query(models.Taak, models.Project.postcode)
+        .outerjoin(models.Project, models.Taak.project_id == models.Project.id)
+        .filter(models.Taak.datum == datum)
+        .order_by(models.Taak.id)
+        .all()
+    )
+
+    per_uitvoerder: dict[str, list[Stop]] = {}
+    zonder_uitvoerder: list[Stop] = []
+    zonder_locatie: list[int] = []
+    for taak, postcode in rijen:
+        locatie = geocoder.locatie(postcode)
+        if locatie is None:
+            zonder_locatie.append(taak.id)
+            continue
+        stop = Stop(taak.id, taak.project_id, taak.titel, normaliseer_postcode(postcode), *locatie)
+        uitvoerder = (taak.uitvoerder or "").strip()
+        if uitvoerder:
+            per_uitvoerder.setdefault(uitvoerder, []).append(stop)
+        else:
+            zonder_uitvoerder.append(stop)
+
+    # Taken zonder uitvoerder gaan naar de installateur wiens werkgebied die dag het dichtst bij ligt
+    if per_uitvoerder:
+        zwaartepunten = {u: _zwaartepunt(s) for u, s in per_uitvoerder.items()}
+        for stop in zonder_uitvoerder:
+            uitvoerder = min(zwaartepunten, key=lambda u: afstand_km(zwaartepunten[u], (stop.lat, stop.lon)))
+            per_uitvoerder[uitvoerder].append(stop)
+    elif zonder_uitvoerder:
+        per_uitvoerder[NIET_TOEGEWEZEN] = zonder_uitvoerder
+
+    # Rekentijd voor 2-opt wordt naar rato van het aantal stops verdeeld
+    totaal_stops = sum(len(s) for s in per_uitvoerder.values()) or 1
+    routes = []
+    for uitvoerder, stops in sorted(per_uitvoerder.items()):
+        budget = MAX_REKENTIJD * len(stops) / totaal_stops
+        volgorde, lengte = plan_route(stops, depot, time.perf_counter() + budget)
+        routes.append({
+            "uitvoerder": uitvoerder,
+            "afstand_km": round(lengte, 2),
+            "stops": [
+                {"volgorde": i + 1, "taak_id": s.taak_id, "project_id": s.project_id,
+                 "titel": s.titel, "postcode": s.postcode}
+                for i, s in enumerate(volgorde)
+            ],
+        })
+
+    return {
+        "datum": datum.isoformat(),
+        "routes": routes,
+        "zonder_locatie": zonder_locatie,
+        "rekentijd_ms": round((time.perf_counter() - begin) * 1000, 1),
+    }
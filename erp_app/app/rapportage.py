@@ -0,0 +1,259 @@
+"""Rapportage op basis van voorgeaggregeerde rollup-tabellen.
+
+De CRUD-laag houdt de rollups incrementeel bij (zie ``pas_toe``) zodat de
+rapportage-endpoints alleen een handvol rijen uit ``rapport_rollups`` lezen.
+Tellers worden met atomische SQL opgehoogd; wijzigingen aan bestaande rijen gaan
+via ``wijzig``, zodat de afgetrokken bijdrage bij de echt vervangen waarde hoort,
+ook met meerdere workers tegelijk.
+``ververs_rollups`` bouwt alles opnieuw op vanuit de brontabellen en kan als
+geplande job draaien: ``python -m app.rapportage``.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from . import models
+
+RAPPORT_STATUS_MAAND = "projecten_status_maand"
+RAPPORT_DOORLOOPTIJD = "doorlooptijd_maand"
+RAPPORT_TAKEN_UITVOERDER = "taken_uitvoerder"
+RAPPORT_KLANT_SEGMENT = "klanten_segment"
+
+ONBEKEND = "onbekend"
+
+# Een bijdrage is (rapport, sleutel, aantal, totaal)
+Bijdrage = tuple[str, str, int, float]
+
+# Velden waarvan de bijdrage van een rij afhangt
+BEPALENDE_VELDEN = {
+    models.Project: ("status", "startdatum", "einddatum"),
+    models.Taak: ("uitvoerder", "status"),
+    models.Klant: ("klanttype", "woonplaats"),
+}
+WIJZIG_POGINGEN = 5
+
+
+def _waarde(v) -> str:
+    v = getattr(v, "value", v)
+    return str(v) if v not in (None, "") else ONBEKEND
+
+
+def _maand(d: Optional[date]) -> str:
+    return d.strftime("%Y-%m") if d else ONBEKEND
+
+
+# ======================
+# BIJDRAGEN PER RIJ
+# ======================
+
+def project_bijdragen(project: models.Project) -> list[Bijdrage]:
+    bijdragen = [(
+        RAPPORT_STATUS_MAAND,
+        f"{_waarde(project.status)}|{_maand(project.startdatum)}",
+        1, 0.0,
+    )]
+    if project.startdatum and project.einddatum:
+        dagen = (project.einddatum - project.startdatum).days
+        bijdragen.append((RAPPORT_DOORLOOPTIJD, _maand(project.einddatum), 1, float(dagen)))
+    return bijdragen
+
+
+def taak_bijdragen(taak: models.Taak) -> list[Bijdrage]:
+    return [(RAPPORT_TAKEN_UITVOERDER, f"{_waarde(taak.uitvoerder)}|{_waarde(taak.status)}", 1, 0.0)]
+
+
+def klant_bijdragen(klant: models.Klant) -> list[Bijdrage]:
+    return [(RAPPORT_KLANT_SEGMENT, f"{_waarde(klant.klanttype)}|{_waarde(klant.woonplaats)}", 1, 0.0)]
+
+
+def pas_toe(db: Session, bijdragen: Iterable[Bijdrage], teken: int = 1):
+    """Verwerk bijdragen in de rollups binnen de lopende transactie (zonder commit)."""
+    totalen = defaultdict(lambda: [0, 0.0])
+    for rapport, sleutel, aantal, totaal in bijdragen:
+        totalen[(rapport, sleutel)][0] += teken * aantal
+        totalen[(rapport, sleutel)][1] += teken * totaal
+    _schrijf(db, totalen)
+
+
+def _schrijf(db: Session, totalen: dict):
+    totalen = {k: v for k, v in totalen.items() if v[0] or v[1]}
+    if not totalen:
+        return
+    # Upsert met "aantal = aantal + delta" in de database: geen lees-wijzig-schrijf in Python
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    tabel = models.RapportRollup.__table__
+    stmt = insert(tabel)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabel.c.rapport, tabel.c.sleutel],
+        set_={"aantal": tabel.c.aantal + stmt.excluded.aantal, "totaal": tabel.c.totaal + stmt.excluded.totaal},
+    )
+    db.execute(stmt, [
+        {"rapport": rapport, "sleutel": sleutel, "aantal": aantal, "totaal": totaal}
+        for (rapport, sleutel), (aantal, totaal) in sorted(totalen.items())
+    ])
+
+
+def wijzig(db: Session, obj, nieuw: dict, bijdragen: Callable[[object], list[Bijdrage]]) -> bool:
+    """Wijzig ``obj`` en verwerk het verschil in de rollups (zonder commit).
+
+    De bepalende velden worden eerst met een voorwaardelijke UPDATE
+    (``WHERE veld = gelezen waarde``) gezet. Heeft een ander verzoek de rij
+    intussen gewijzigd, dan worden de actuele waarden opnieuw gelezen en volgt
+    een nieuwe poging. Met ``verwijderd_op`` in ``nieuw`` wordt alleen de oude
+    bijdrage afgetrokken. Geeft False terug als de rij al verwijderd is.
+    """
+    model = type(obj)
+    velden = set(BEPALENDE_VELDEN[model]) | set(nieuw)
+    if hasattr(model, "verwijderd_op"):
+        velden.add("verwijderd_op")
+    kolommen = {k: getattr(model, k) for k in sorted(velden)}
+
+    for _ in range(WIJZIG_POGINGEN):
+        if getattr(obj, "verwijderd_op", None) is not None:
+            return False
+        voorwaarden = [kolom == getattr(obj, k) for k, kolom in kolommen.items()]
+        resultaat = db.execute(
+            update(model).where(model.id == obj.id, *voorwaarden)
+            .values(**nieuw).execution_options(synchronize_session=False)
+        )
+        if resultaat.rowcount == 1:
+            pas_toe(db, bijdragen(obj), teken=-1)
+            # Ook op het object zetten, zodat de audit-trail de wijziging ziet
+            for k, v in nieuw.items():
+                setattr(obj, k, v)
+            if nieuw.get("verwijderd_op") is None:
+                pas_toe(db, bijdragen(obj))
+            return True
+
+        actueel = db.execute(
+            select(*kolommen.values()).where(model.id == obj.id)
+            .execution_options(inclusief_verwijderd=True)
+        ).first()
+        if actueel is None:
+            return False
+        for k, v in zip(kolommen, actueel):
+            set_committed_value(obj, k, v)
+    raise RuntimeError(f"{model.__tablename__} {obj.id}: te veel gelijktijdige wijzigingen")
+
+
+# ======================
+# VOLLEDIG VERVERSEN
+# ======================
+
+def ververs_rollups(db: Session):
+    """Bouw alle rollups opnieuw op met GROUP BY-queries op de brontabellen."""
+    totalen = defaultdict(lambda: [0, 0.0])
+
+    for status, startdatum, aantal in (
+        db.query(models.Project.status, models.Project.startdatum, func.count(models.Project.id))
+        .group_by(models.Project.status, models.Project.startdatum)
+    ):
+        totalen[(RAPPORT_STATUS_MAAND, f"{_waarde(status)}|{_maand(startdatum)}")][0] += aantal
+
+    for startdatum, einddatum, aantal in (
+        db.query(models.Project.startdatum, models.Project.einddatum, func.count(models.Project.id))
+        .filter(models.Project.startdatum.isnot(None), models.Project.einddatum.isnot(None))
+        .group_by(models.Project.startdatum, models.Project.einddatum)
+    ):
+        t = totalen[(RAPPORT_DOORLOOPTIJD, _maand(einddatum))]
+        t[0] += aantal
+        t[1] += aantal * (einddatum - startdatum).days
+
+    for uitvoerder, status, aantal in (
+        db.query(models.Taak.uitvoerder, models.Taak.status, func.count(models.Taak.id))
+        .group_by(models.Taak.uitvoerder, models.Taak.status)
+    ):
+        totalen[(RAPPORT_TAKEN_UITVOERDER, f"{_waarde(uitvoerder)}|{_waarde(status)}")][0] += aantal
+
+    for klanttype, woonplaats, aantal in (
+        db.query(models.Klant.klanttype, models.Klant.woonplaats, func.count(models.Klant.id))
+        .group_by(models.Klant.klanttype, models.Klant.woonplaats)
+    ):
+        totalen[(RAPPORT_KLANT_SEGMENT, f"{_waarde(klanttype)}|{_waarde(woonplaats)}")][0] += aantal
+
+    db.query(models.RapportRollup).delete()
+    db.add_all(
+        models.RapportRollup(rapport=rapport, sleutel=sleutel, aantal=aantal, totaal=totaal)
+        for (rapport, sleutel), (aantal, totaal) in totalen.items()
+    )
+    db.commit()
+
+
+# ======================
+# LEZEN
+# ======================
+
+def _rollups(db: Session, rapport: str):
+    return (
+        db.query(models.RapportRollup.sleutel, models.RapportRollup.aantal, models.RapportRollup.totaal)
+        .filter(models.RapportRollup.rapport == rapport, models.RapportRollup.aantal != 0)
+        .all()
+    )
+
+
+def _in_bereik(maand: str, van: Optional[str], tot: Optional[str]) -> bool:
+    # "YYYY-MM" sorteert lexicografisch; "onbekend" valt alleen binnen een open bereik
+    if maand == ONBEKEND:
+        return van is None and tot is None
+    return (van is None or maand >= van) and (tot is None or maand <= tot)
+
+
+def projecten_per_status_per_maand(db: Session, van: Optional[str] = None, tot: Optional[str] = None) -> dict:
+    resultaat: dict[str, dict[str, int]] = defaultdict(dict)
+    for sleutel, aantal, _ in _rollups(db, RAPPORT_STATUS_MAAND):
+        status, maand = sleutel.split("|", 1)
+        if _in_bereik(maand, van, tot):
+            resultaat[maand][status] = aantal
+    return dict(sorted(resultaat.items()))
+
+
+def doorlooptijd_per_maand(db: Session, van: Optional[str] = None, tot: Optional[str] = None) -> list[dict]:
+    return [
+        {"maand": maand, "projecten": aantal, "gemiddeld_dagen": round(totaal / aantal, 1)}
+        for maand, aantal, totaal in sorted(_rollups(db, RAPPORT_DOORLOOPTIJD))
+        if _in_bereik(maand, van, tot)
+    ]
+
+
+def taken_per_uitvoerder(db: Session) -> list[dict]:
+    per_uitvoerder: dict[str, dict[str, int]] = defaultdict(dict)
+    for sleutel, aantal, _ in _rollups(db, RAPPORT_TAKEN_UITVOERDER):
+        uitvoerder, status = sleutel.rsplit("|", 1)
+        per_uitvoerder[uitvoerder][status] = aantal
+
+    resultaat = []
+    for uitvoerder, per_status in sorted(per_uitvoerder.items()):
+        totaal = sum(per_status.values())
+        afgerond = per_status.get(models.TaakStatusEnum.afgerond.value, 0)
+        resultaat.append({
+            "uitvoerder": uitvoerder,
+            "totaal": totaal,
+            "per_status": per_status,
+            "afgerond_percentage": round(100 * afgerond / totaal, 1) if totaal else 0.0,
+        })
+    return resultaat
+
+
+def klanten_per_segment(db: Session) -> list[dict]:
+    resultaat = []
+    for sleutel, aantal, _ in _rollups(db, RAPPORT_KLANT_SEGMENT):
+        klanttype, woonplaats = sleutel.split("|", 1)
+        resultaat.append({"klanttype": klanttype, "woonplaats": woonplaats, "aantal": aantal})
+    return sorted(resultaat, key=lambda r: (r["klanttype"], r["woonplaats"]))
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ververs_rollups(db)
+    finally:
+        db.close()
@@ -0,0 +1,190 @@
+"""Rate limiting met token buckets per client en kosten per route.
+
+Elke client (API-sleutel of IP-adres) heeft een bucket die met
+``RATE_LIMIT_PER_SECONDE`` tokens per seconde wordt bijgevuld tot
+``RATE_LIMIT_CAPACITEIT``. Een verzoek kost het gewicht uit ``ROUTE_KOSTEN``;
+is de bucket leeg, dan volgt een 429 met ``Retry-After``.
+
+Standaard staat de toestand in het geheugen van het proces. Met
+``RATE_LIMIT_DB=/pad/naar/ratelimit.db`` delen alle workers één SQLite-bestand.
+
+Clients worden op IP-adres geteld. Alleen een ``X-API-Key`` uit
+``RATE_LIMIT_API_SLEUTELS`` (kommagescheiden) krijgt een eigen bucket; een
+willekeurige header levert dus geen nieuwe, volle bucket op.
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+CAPACITEIT = float(os.getenv("RATE_LIMIT_CAPACITEIT", "60"))
+PER_SECONDE = float(os.getenv("RATE_LIMIT_PER_SECONDE", "10"))
+GEDEELDE_DB = os.getenv("RATE_LIMIT_DB")
+UITGESCHAKELD = os.getenv("RATE_LIMIT_UIT", "").lower() in ("1", "true", "ja")
+API_SLEUTELS = frozenset(s.strip() for s in os.getenv("RATE_LIMIT_API_SLEUTELS", "").split(",") if s.strip())
+
+# (methode, padpatroon, kosten); de eerste match telt, anders kost een verzoek 1 token
+ROUTE_KOSTEN = [
+    ("GET", re.compile(r"^/klanten/zoek/?$"), 5),
+    ("GET", re.compile(r"^/projecten/?$"), 10),
+    ("GET", re.compile(r"^/documenten/zip/"), 10),
+    ("GET", re.compile(r"^/planning/"), 5),
+    ("GET", re.compile(r"^/rapportage/"), 2),
+    ("GET", re.compile(r"^/duplicaten/?$"), 20),
+    ("POST", re.compile(r"^/rapportage/verversen$"), 20),
+    ("POST", re.compile(r"^/opslag/(opruimen|archiveren)$"), 20),
+]
+
+
+def kosten_voor(methode: str, pad: str) -> float:
+    for route_methode, patroon, kosten in ROUTE_KOSTEN:
+        if methode == route_methode and patroon.match(pad):
+            return kosten
+    return 1
+
+
+# ======================
+# BUCKET-OPSLAG
+# ======================
+
+class GeheugenBuckets:
+    """Token buckets in het geheugen van dit proces."""
+
+    MAX_CLIENTS = 10000
+    blokkerend = False
+
+    def __init__(self, capaciteit: float = CAPACITEIT, per_seconde: float = PER_SECONDE):
+        self.capaciteit = capaciteit
+        self.per_seconde = per_seconde
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def neem(self, sleutel: str, kosten: float) -> float:
+        """Neem ``kosten`` tokens; geeft 0 terug bij succes, anders de wachttijd in seconden."""
+        kosten = min(kosten, self.capaciteit)
+        nu = time.monotonic()
+        with self._lock:
+            tokens, laatst = self._buckets.get(sleutel, (self.capaciteit, nu))
+            tokens = min(self.capaciteit, tokens + (nu - laatst) * self.per_seconde)
+            wacht = 0.0
+            if tokens >= kosten:
+                tokens -= kosten
+            else:
+                wacht = (kosten - tokens) / self.per_seconde
+            self._buckets[sleutel] = (tokens, nu)
+            if len(self._buckets) > self.MAX_CLIENTS:
+                self._ruim_op(nu)
+            return wacht
+
+    def _ruim_op(self, nu: float):
+        # Buckets die inmiddels weer vol zijn, zijn niet te onderscheiden van nieuwe clients
+        vol = self.capaciteit / self.per_seconde
+        self._buckets = {k: v for k, v in self._buckets.items() if nu - v[1] < vol}
+        if len(self._buckets) > self.MAX_CLIENTS * 0.9:
+            # Nog steeds te veel actieve clients: vergeet de langst niet geziene
+            bewaren = sorted(self._buckets.items(), key=lambda kv: kv[1][1])[-int(self.MAX_CLIENTS * 0.9):]
+            self._buckets = dict(bewaren)
+
+
+class SqliteBuckets:
+    """Token buckets in een SQLite-bestand, gedeeld tussen workers op dezelfde machine."""
+
+    # Kan op de schrijflock wachten; de middleware roept dit vanuit de threadpool aan
+    blokkerend = True
+
+    def __init__(self, pad: str, capaciteit: float = CAPACITEIT, per_seconde: float = PER_SECONDE):
+        self.capaciteit = capaciteit
+        self.per_seconde = per_seconde
+        self.pad = pad
+        self._lokaal = threading.local()
+        with self._verbinding() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (sleutel TEXT PRIMARY KEY, tokens REAL, tijd REAL)")
+
+    def _verbinding(self) -> sqlite3.Connection:
+        conn = getattr(self._lokaal, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.pad, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._lokaal.conn = conn
+        return conn
+
+    def neem(self, sleutel: str, kosten: float) -> float:
+        kosten = min(kosten, self.capaciteit)
+        # time.time in plaats van monotonic: de klok moet tussen processen vergelijkbaar zijn
+        nu = time.time()
+        conn = self._verbinding()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rij = conn.execute("SELECT tokens, tijd FROM buckets WHERE sleutel = ?", (sleutel,)).fetchone()
+            tokens, laatst = rij if rij else (self.capaciteit, nu)
+            tokens = min(self.capaciteit, tokens + max(0.0, nu - laatst) * self.per_seconde)
+            wacht = 0.0
+            if tokens >= kosten:
+                tokens -= kosten
+            else:
+                wacht = (kosten - tokens) / self.per_seconde
+            conn.execute("INSERT OR REPLACE INTO buckets (sleutel, tokens, tijd) VALUES (?, ?, ?)", (sleutel, tokens, nu))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wacht
+
+
+def standaard_buckets():
+    return SqliteBuckets(GEDEELDE_DB) if GEDEELDE_DB else GeheugenBuckets()
+
+
+# ======================
+# MIDDLEWARE
+# ======================
+
+def _client_sleutel(scope, api_sleutels: frozenset = API_SLEUTELS) -> str:
+    for naam, waarde in scope.get("headers", []):
+        if naam == b"x-api-key":
+            sleutel = waarde.decode("latin-1")
+            if sleutel in api_sleutels:
+                return "sleutel:" + sleutel
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "onbekend")
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, buckets=None, uitgeschakeld: Optional[bool] = None):
+        self.app = app
+        self.buckets = buckets or standaard_buckets()
+        self.uitgeschakeld = UITGESCHAKELD if uitgeschakeld is None else uitgeschakeld
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.uitgeschakeld:
+            await self.app(scope, receive, send)
+            return
+
+        kosten = kosten_voor(scope["method"], scope["path"])
+        sleutel = _client_sleutel(scope)
+        if getattr(self.buckets, "blokkerend", False):
+            wacht = await run_in_threadpool(self.buckets.neem, sleutel, kosten)
+        else:
+            wacht = self.buckets.neem(sleutel, kosten)
+        if wacht <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Te veel verzoeken, probeer het later opnieuw"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wacht))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+
+from .. import sqlprofiel
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"]
+)
+
+def _alleen_ingeschakeld():
+    # Zonder profiler geen debug-endpoints: ze tonen SQL van andere verzoeken
+    if not sqlprofiel.ingeschakeld():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@router.get("/sql-profielen")
+def sql_profielen():
+    _alleen_ingeschakeld()
+    return sqlprofiel.profielen()
+
+@router.get("/sql-profielen/{profiel_id}")
+def sql_profiel(profiel_id: int):
+    _alleen_ingeschakeld()
+    profiel = sqlprofiel.profiel(profiel_id)
+    if profiel is None:
+        raise HTTPException(status_code=404, detail="Profiel niet gevonden")
+    return profiel
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from .. import crud, models, zipstroom
+from ..database import get_read_db
+
+router = APIRouter(
+    prefix="/documenten",
+    tags=["documenten"]
+)
+
+def _zip_response(bestanden, bestandsnaam: str, alleen_opslaan: bool) -> StreamingResponse:
+    return StreamingResponse(
+        zipstroom.zip_stroom(bestanden, alleen_opslaan=alleen_opslaan),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{bestandsnaam}"'},
+    )
+
+@router.get("/zip/project/{project_id}")
+def download_project_zip(project_id: int, alleen_opslaan: bool = False, db: Session = Depends(get_read_db)):
+    if crud.get_project(db, project_id) is None:
+        raise HTTPException(status_code=404, detail="Project niet gevonden")
+    # De lijst wordt vooraf opgehaald; de databasesessie is tijdens het streamen al gesloten
+    bestanden = zipstroom.bestanden_van_project(db, project_id)
+    return _zip_response(bestanden, f"project_{project_id}.zip", alleen_opslaan)
+
+@router.get("/zip/map/{map_id}")
+def download_map_zip(map_id: int, alleen_opslaan: bool = False, db: Session = Depends(get_read_db)):
+    document_map = db.query(models.DocumentMap).filter(models.DocumentMap.id == map_id).first()
+    if document_map is None:
+        raise HTTPException(status_code=404, detail="Map niet gevonden")
+    bestanden = zipstroom.bestanden_van_map(document_map)
+    return _zip_response(bestanden, f"map_{map_id}.zip", alleen_opslaan)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import crud, dedupe
+from ..database import get_db, get_read_db
+
+router = APIRouter(
+    prefix="/duplicaten",
+    tags=["duplicaten"]
+)
+
+@router.get("/")
+def alle_duplicaten(drempel: float = dedupe.DREMPEL, db: Session = Depends(get_read_db)):
+    return dedupe.vind_alle_duplicaten(db, drempel=drempel)
+
+@router.get("/klant/{klant_id}")
+def duplicaten_van_klant(klant_id: int, db: Session = Depends(get_read_db)):
+    klant = crud.get_klant(db, klant_id)
+    if klant is None:
+        raise HTTPException(status_code=404, detail="Klant niet gevonden")
+    return dedupe.kandidaten(db, klant, exclude_klant_id=klant_id)
+
+@router.post("/samenvoegen")
+def samenvoegen(behouden_id: int, duplicaat_id: int, db: Session = Depends(get_db)):
+    if behouden_id == duplicaat_id:
+        raise HTTPException(status_code=400, detail="Een klant kan niet met zichzelf worden samengevoegd")
+    resultaat = dedupe.voeg_samen(db, behouden_id, duplicaat_id)
+    if resultaat is None:
+        raise HTTPException(status_code=404, detail="Klant niet gevonden")
+    return resultaat
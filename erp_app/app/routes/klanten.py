@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from .. import crud, models, schemas
-from ..database import get_db
+from .. import crud, models, schemas, dedupe
+from ..database import get_db, get_read_db
 from fastapi.responses import JSONResponse
 
 router = APIRouter(
@@ -9,13 +9,16 @@ router = APIRouter(
     tags=["klanten"]
 )
 
-@router.post("/", response_model=schemas.KlantOut)
-def create_klant(klant: schemas.KlantCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=schemas.KlantAangemaakt)
+def create_klant(klant: schemas.KlantCreate, negeer_duplicaten: bool = False, db: Session = Depends(get_db)):
     if crud.is_email_in_use(db, klant.email):
         raise HTTPException(status_code=400, detail="E-mail is al in gebruik")
     if crud.is_klantnummer_in_use(db, klant.klantnummer):
         raise HTTPException(status_code=400, detail="Klantnummer is al in gebruik")
-    return crud.create_klant(db=db, klant=klant)
+    # negeer_duplicaten slaat het scoren over, bijv. bij bulkimports
+    kandidaten = [] if negeer_duplicaten else dedupe.kandidaten(db, klant)
+    db_klant = crud.create_klant(db=db, klant=klant)
+    return {**schemas.KlantOut.model_validate(db_klant).model_dump(), "mogelijke_duplicaten": kandidaten}
 
 
 @router.put("/{klant_id}")
@@ -39,18 +42,22 @@ def update_klant(klant_id: int, klant_data: schemas.KlantCreate, db: Session = D
     )
 
 @router.get("/zoek", response_model=list[schemas.KlantOut])
-def zoek_klanten(query: str = Query(..., min_length=1), db: Session = Depends(get_db)):
+def zoek_klanten(query: str = Query(..., min_length=1), db: Session = Depends(get_read_db)):
     resultaten = crud.zoek_klanten(db, zoekterm=query)
     if not resultaten:
         raise HTTPException(status_code=404, detail=f"Geen klanten gevonden voor zoekterm: '{query}'")
     return resultaten
 
 @router.get("/", response_model=list[schemas.KlantOut])
-def list_klanten(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_klanten(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=crud.MAX_PAGINA_GROOTTE),
+    db: Session = Depends(get_read_db),
+):
     return crud.get_klanten(db, skip=skip, limit=limit)
 
 @router.get("/{klant_id}", response_model=schemas.KlantOut)
-def read_klant(klant_id: int, db: Session = Depends(get_db)):
+def read_klant(klant_id: int, db: Session = Depends(get_read_db)):
     db_klant = crud.get_klant(db, klant_id=klant_id)
     if db_klant is None:
         raise HTTPException(status_code=404, detail="Klant niet gevonden")
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from .. import opslag
+from ..database import get_db
+
+router = APIRouter(
+    prefix="/opslag",
+    tags=["opslag"]
+)
+
+@router.get("/gebruik")
+def gebruik_per_project():
+    return opslag.gebruik_per_project()
+
+@router.post("/opruimen")
+def ruim_op(droog: bool = False, db: Session = Depends(get_db)):
+    return opslag.ruim_op(db, droog=droog)
+
+@router.post("/archiveren")
+def archiveer(db: Session = Depends(get_db)):
+    return opslag.archiveer_afgeronde_projecten(db)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from datetime import date
+
+from .. import planning
+from ..database import get_read_db
+
+router = APIRouter(
+    prefix="/planning",
+    tags=["planning"]
+)
+
+@router.get("/{datum}")
+def dagplanning(datum: date, db: Session = Depends(get_read_db)):
+    return planning.plan_dag(db, datum)
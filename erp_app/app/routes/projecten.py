@@ -1,11 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from sqlalchemy.orm import Session
 from typing import List
-import os
-import shutil
-
-from .. import models, schemas, crud
-from ..database import get_db
+from .. import models, schemas, crud, opslag, gezondheid
+from ..database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/projecten",
@@ -13,11 +10,15 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.ProjectOut])
-def list_projecten(db: Session = Depends(get_db)):
-    return crud.get_projecten(db)
+def list_projecten(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=crud.MAX_PAGINA_GROOTTE),
+    db: Session = Depends(get_read_db),
+):
+    return crud.get_projecten(db, skip=skip, limit=limit)
 
 @router.get("/{project_id}", response_model=schemas.ProjectOut)
-def get_project(project_id: int, db: Session = Depends(get_db)):
+def get_project(project_id: int, db: Session = Depends(get_read_db)):
     project = crud.get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project niet gevonden")
@@ -58,17 +59,27 @@ def upload_document(
     file: UploadFile = File(...),
     project_id: int = Form(...),
     mapnaam: str = Form(...),
+    db: Session = Depends(get_db),
 ):
-    upload_pad = f"uploads/project_{project_id}/{mapnaam}"
-    os.makedirs(upload_pad, exist_ok=True)
-    bestandspad = os.path.join(upload_pad, file.filename)
-
-    with open(bestandspad, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    try:
+        with gezondheid.upload_bezig():
+            bestandspad = opslag.bewaar(file.file, project_id, file.filename, submap=mapnaam)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    document_map = crud.get_of_maak_document_map(db, project_id, mapnaam)
+    crud.upload_document(db, schemas.DocumentCreate(
+        bestandsnaam=file.filename,
+        pad=bestandspad,
+        map_id=document_map.id,
+        project_id=project_id
+    ))
     return {"message": f"{file.filename} geüpload"}
 
 @router.delete("/documenten/{document_id}")
-def delete_document(document_id: int):
-    # Placeholder – later uit te breiden met database koppeling
-    return {"message": f"Document {document_id} verwijderd (placeholder)"}
+def delete_document(document_id: int, db: Session = Depends(get_db)):
+    doc = crud.delete_document(db, document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document niet gevonden")
+    opslag.verwijder_als_wees(db, doc.pad)
+    return {"message": f"Document {document_id} verwijderd"}
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .. import rapportage
+from ..database import get_db, get_read_db
+
+router = APIRouter(
+    prefix="/rapportage",
+    tags=["rapportage"]
+)
+
+MAAND_PATROON = r"^\d{4}-\d{2}$"
+
+@router.get("/projecten-per-status")
+def projecten_per_status(
+    van: Optional[str] = Query(None, pattern=MAAND_PATROON),
+    tot: Optional[str] = Query(None, pattern=MAAND_PATROON),
+    db: Session = Depends(get_read_db),
+):
+    return rapportage.projecten_per_status_per_maand(db, van=van, tot=tot)
+
+@router.get("/doorlooptijd")
+def doorlooptijd(
+    van: Optional[str] = Query(None, pattern=MAAND_PATROON),
+    tot: Optional[str] = Query(None, pattern=MAAND_PATROON),
+    db: Session = Depends(get_read_db),
+):
+    return rapportage.doorlooptijd_per_maand(db, van=van, tot=tot)
+
+@router.get("/taken-per-uitvoerder")
+def taken_per_uitvoerder(db: Session = Depends(get_read_db)):
+    return rapportage.taken_per_uitvoerder(db)
+
+@router.get("/klanten-per-segment")
+def klanten_per_segment(db: Session = Depends(get_read_db)):
+    return rapportage.klanten_per_segment(db)
+
+@router.post("/verversen")
+def ververs(db: Session = Depends(get_db)):
+    rapportage.ververs_rollups(db)
+    return {"message": "Rapportages ververst"}
@@ -51,6 +51,18 @@ class KlantOut(KlantBase):
         from_attributes = True
 
 
+class DuplicaatKandidaat(BaseModel):
+    klant_id: int
+    klantnummer: Optional[str] = None
+    naam: str
+    score: float
+
+
+class KlantAangemaakt(KlantOut):
+    # Bestaande klanten die op de nieuwe lijken; samenvoegen kan via /duplicaten/samenvoegen
+    mogelijke_duplicaten: List[DuplicaatKandidaat] = []
+
+
 # =====================
 # TAKEN
 # =====================
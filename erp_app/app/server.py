@@ -0,0 +1,63 @@
+"""Productieserver met meerdere workers.
+
+    python -m app.server --workers 4
+
+Alle opties hebben een omgevingsvariabele als standaard (ERP_HOST, ERP_PORT,
+ERP_WORKERS, ERP_GRACEFUL_TIMEOUT, ERP_LOG_LEVEL). Het schema wordt eenmalig in
+het hoofdproces gemigreerd (``alembic upgrade head``, zie app/migraties.py), en
+ook de snapshot-replica (DATABASE_SNAPSHOT_PAD) wordt daar gestart;
+elke worker warmt daarna zijn eigen connection pool op.
+Bij SIGTERM gaat ``/ready`` op 503 en krijgen lopende verzoeken (uploads)
+``--graceful-timeout`` seconden om af te ronden.
+"""
+import argparse
+import os
+
+from . import migraties
+from .database import start_snapshot_replica
+
+
+def standaard_workers() -> int:
+    return int(os.getenv("ERP_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Start de ERP API")
+    parser.add_argument("--host", default=os.getenv("ERP_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ERP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=standaard_workers(),
+                        help="aantal workerprocessen (standaard: aantal cores)")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("ERP_GRACEFUL_TIMEOUT", "30")),
+                        help="seconden om lopende verzoeken af te ronden bij afsluiten")
+    parser.add_argument("--log-level", default=os.getenv("ERP_LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is niet geïnstalleerd: pip install uvicorn")
+
+    migraties.bijwerken()
+    # Workers erven de omgeving; zo slaan ze de migratie over en kennen ze de timeout
+    os.environ["ERP_SCHEMA_GEREED"] = "1"
+    os.environ["ERP_GRACEFUL_TIMEOUT"] = str(args.graceful_timeout)
+    # Eén snapshot-thread in het hoofdproces in plaats van één per worker
+    start_snapshot_replica()
+    os.environ["ERP_SNAPSHOT_DOOR_SERVER"] = "1"
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Per-verzoek SQL-profiler voor het opsporen van trage pagina's.
+
+Met ``SQL_PROFIEL=header`` wordt een verzoek geprofileerd als het de header
+``X-SQL-Profiel: 1`` meestuurt; met ``SQL_PROFIEL=altijd`` elk verzoek. Per
+statement worden de duur en de aanroepende regel in ``app/`` bijgehouden.
+Statements boven ``SQL_PROFIEL_DREMPEL_MS`` krijgen na afloop van het verzoek een
+``EXPLAIN QUERY PLAN``. Het antwoord krijgt een samenvatting in de header
+``X-SQL-Profiel``; de details staan onder ``/debug/sql-profielen``.
+
+Staat de profiler uit, dan worden de engine-hooks nooit gekoppeld. In de
+header-modus kost een niet-geprofileerd statement één ``ContextVar``-lookup.
+"""
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+from . import database
+
+logger = logging.getLogger(__name__)
+
+MODUS = os.getenv("SQL_PROFIEL", "uit").lower()  # uit | header | altijd
+DREMPEL_MS = float(os.getenv("SQL_PROFIEL_DREMPEL_MS", "50"))
+BEWAAR = int(os.getenv("SQL_PROFIEL_BEWAAR", "50"))
+MAX_STATEMENTS = 1000  # per verzoek; daarna wordt alleen nog geteld
+HEADER = b"x-sql-profiel"
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SQLALCHEMY_DIR = os.sep + "sqlalchemy" + os.sep
+# Deze modules voeren zelf geen queries uit namens de aanroeper; zoek verder omhoog
+OVERGESLAGEN = {os.path.abspath(__file__), os.path.abspath(database.__file__)}
+
+_actief: ContextVar[Optional["Profiel"]] = ContextVar("sql_profiel", default=None)
+_profielen: deque = deque(maxlen=BEWAAR)
+_volgnummer = itertools.count(1)
+_koppel_lock = threading.Lock()
+_gekoppeld = False
+
+
+def ingeschakeld() -> bool:
+    return MODUS in ("header", "altijd")
+
+
+# ======================
+# VASTLEGGEN
+# ======================
+
+class Profiel:
+    def __init__(self, methode: str, pad: str):
+        self.id = next(_volgnummer)
+        self.methode = methode
+        self.pad = pad
+        self.start = time.perf_counter()
+        self.statements: list[dict] = []
+        self.aantal = 0
+        self.sql_ms = 0.0
+        self.trage: list[tuple] = []  # (statement-dict, engine, parameters) voor EXPLAIN
+
+    def registreer(self, engine, statement: str, parameters, duur_ms: float, executemany: bool):
+        self.aantal += 1
+        self.sql_ms += duur_ms
+        if len(self.statements) >= MAX_STATEMENTS:
+            return
+        regel = {"sql": statement, "ms": round(duur_ms, 3), "aanroep": _aanroeper(), "executemany": executemany}
+        self.statements.append(regel)
+        if duur_ms >= DREMPEL_MS and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            self.trage.append((regel, engine, parameters))
+
+    def samenvatting(self) -> dict:
+        herhaald = Counter(s["sql"] for s in self.statements)
+        return {
+            "id": self.id,
+            "methode": self.methode,
+            "pad": self.pad,
+            "aantal": self.aantal,
+            "sql_ms": round(self.sql_ms, 3),
+            "traagste_ms": max((s["ms"] for s in self.statements), default=0.0),
+            # Hetzelfde statement vaak achter elkaar wijst meestal op een N+1-patroon
+            "herhaald": [{"sql": sql, "aantal": n} for sql, n in herhaald.most_common(5) if n > 1],
+        }
+
+    def header(self) -> bytes:
+        traagste = max((s["ms"] for s in self.statements), default=0.0)
+        return (f"id={self.id}; aantal={self.aantal}; sql_ms={self.sql_ms:.1f}; "
+                f"traagste_ms={traagste:.1f}").encode()
+
+
+def _frame_tekst(frame, basis: str) -> str:
+    return f"{os.path.relpath(frame.f_code.co_filename, basis)}:{frame.f_lineno} ({frame.f_code.co_name})"
+
+
+def _aanroeper() -> Optional[str]:
+    """Eerste frame in ``app/`` buiten de profiler en ``database.py``.
+
+    Lazy loads tijdens het serialiseren van het antwoord hebben geen frame in
+    ``app/``; dan volgt het eerste frame buiten SQLAlchemy (meestal FastAPI).
+    """
+    frame = sys._getframe(2)
+    buiten_sqlalchemy = None
+    while frame is not None:
+        pad = frame.f_code.co_filename
+        if pad.startswith(APP_DIR):
+            if pad not in OVERGESLAGEN:
+                return _frame_tekst(frame, os.path.dirname(APP_DIR))
+        elif buiten_sqlalchemy is None and SQLALCHEMY_DIR not in pad:
+            buiten_sqlalchemy = frame
+        frame = frame.f_back
+    if buiten_sqlalchemy is None:
+        return None
+    return _frame_tekst(buiten_sqlalchemy, os.path.dirname(os.path.dirname(buiten_sqlalchemy.f_code.co_filename)))
+
+
+def _voor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _actief.get() is not None:
+        conn.info.setdefault("sql_profiel_start", []).append(time.perf_counter())
+
+
+def _na_execute(conn, cursor, statement, parameters, context, executemany):
+    profiel = _actief.get()
+    if profiel is None:
+        return
+    starts = conn.info.get("sql_profiel_start")
+    if not starts:
+        return
+    duur_ms = (time.perf_counter() - starts.pop()) * 1000
+    profiel.registreer(conn.engine, statement, parameters, duur_ms, executemany)
+
+
+def koppel_engines():
+    """Koppel de hooks eenmalig aan de primary en alle replica's."""
+    global _gekoppeld
+    if _gekoppeld:
+        return
+    with _koppel_lock:
+        if _gekoppeld:
+            return
+        for engine in [database.engine, *database.replica_engines]:
+            event.listen(engine, "before_cursor_execute", _voor_execute)
+            event.listen(engine, "after_cursor_execute", _na_execute)
+        _gekoppeld = True
+
+
+# ======================
+# EXPLAIN
+# ======================
+
+def _explain(profiel: Profiel):
+    for regel, engine, parameters in profiel.trage:
+        if engine.dialect.name == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        elif engine.dialect.name == "postgresql":
+            prefix = "EXPLAIN "
+        else:
+            continue
+        try:
+            with engine.connect() as conn:
+                rijen = conn.exec_driver_sql(prefix + regel["sql"], parameters).all()
+            # SQLite: (id, parent, notused, detail); PostgreSQL: één kolom per planregel
+            regel["plan"] = [str(rij[-1]) for rij in rijen]
+        except Exception as e:
+            regel["plan"] = [f"fout: {e.__class__.__name__}"]
+    profiel.trage = []
+
+
+def rond_af(profiel: Profiel):
+    """Draai EXPLAIN voor de trage statements en bewaar het profiel."""
+    _explain(profiel)
+    resultaat = profiel.samenvatting()
+    resultaat["totaal_ms"] = round((time.perf_counter() - profiel.start) * 1000, 3)
+    resultaat["statements"] = profiel.statements
+    _profielen.append(resultaat)
+    if resultaat["sql_ms"] >= DREMPEL_MS:
+        logger.info("SQL-profiel %s %s: %d statements, %.1f ms", profiel.methode, profiel.pad,
+                    profiel.aantal, profiel.sql_ms)
+
+
+def profielen() -> list[dict]:
+    return [{k: v for k, v in p.items() if k != "statements"} for p in reversed(_profielen)]
+
+
+def profiel(profiel_id: int) -> Optional[dict]:
+    return next((p for p in _profielen if p["id"] == profiel_id), None)
+
+
+# ======================
+# MIDDLEWARE
+# ======================
+
+def _gevraagd(scope) -> bool:
+    if MODUS == "altijd":
+        return True
+    for naam, waarde in scope.get("headers", []):
+        if naam == HEADER:
+            return waarde.strip().lower() in (b"1", b"true", b"ja")
+    return False
+
+
+class SqlProfielMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ingeschakeld() or not _gevraagd(scope):
+            await self.app(scope, receive, send)
+            return
+
+        koppel_engines()
+        huidig = Profiel(scope["method"], scope["path"])
+        token = _actief.set(huidig)
+
+        async def send_met_header(bericht):
+            if bericht["type"] == "http.response.start":
+                bericht["headers"] = list(bericht.get("headers", [])) + [(HEADER, huidig.header())]
+            await send(bericht)
+
+        try:
+            await self.app(scope, receive, send_met_header)
+        finally:
+            _actief.reset(token)
+            # EXPLAIN raakt de database; niet op de event loop uitvoeren
+            await run_in_threadpool(rond_af, huidig)
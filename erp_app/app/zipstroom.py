@@ -0,0 +1,112 @@
+"""ZIP-archieven die tijdens het downloaden worden opgebouwd.
+
+``zipfile`` schrijft naar een niet-doorzoekbare buffer (met data descriptors), die na
+elk blok wordt leeggemaakt. Het geheugengebruik blijft zo gelijk aan één blok,
+ongeacht de grootte van het project.
+"""
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from . import models, opslag
+
+CHUNK = 256 * 1024
+
+
+class _Buffer:
+    """Minimaal schrijfbaar object; zonder ``tell``/``seek`` kiest zipfile streaming-modus."""
+
+    def __init__(self):
+        self._delen: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._delen.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def leeg(self) -> Iterator[bytes]:
+        if self._delen:
+            data = b"".join(self._delen)
+            self._delen.clear()
+            yield data
+
+
+def _unieke_naam(naam: str, gebruikt: set) -> str:
+    basis, ext = os.path.splitext(naam)
+    kandidaat, i = naam, 1
+    while kandidaat in gebruikt:
+        kandidaat = f"{basis} ({i}){ext}"
+        i += 1
+    gebruikt.add(kandidaat)
+    return kandidaat
+
+
+def zip_stroom(bestanden: Iterable[tuple[str, str]], alleen_opslaan: bool = False) -> Iterator[bytes]:
+    """Genereer een ZIP van (naam in archief, pad) paren in blokken van maximaal ``CHUNK`` bytes."""
+    buffer = _Buffer()
+    gebruikt: set = set()
+    with zipfile.ZipFile(buffer, "w", allowZip64=True) as zf:
+        for arcnaam, pad in bestanden:
+            bron = opslag.open_bestand(pad)
+            if bron is None:
+                continue
+            with bron:
+                info = zipfile.ZipInfo(_unieke_naam(arcnaam, gebruikt), date_time=_datum_tijd(pad))
+                info.external_attr = 0o644 << 16
+                # Al gecomprimeerde formaten opnieuw comprimeren kost alleen CPU
+                if alleen_opslaan or opslag.is_gecomprimeerd(pad):
+                    info.compress_type = zipfile.ZIP_STORED
+                else:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                # Bestandsgrootte is vooraf niet altijd bekend (koude opslag), dus altijd zip64
+                with zf.open(info, "w", force_zip64=True) as uit:
+                    while blok := bron.read(CHUNK):
+                        uit.write(blok)
+                        yield from buffer.leeg()
+            yield from buffer.leeg()
+    yield from buffer.leeg()
+
+
+def _datum_tijd(pad: str) -> tuple:
+    for kandidaat in (pad, opslag.koud_pad(pad)):
+        if kandidaat and os.path.exists(kandidaat):
+            return time.localtime(max(os.path.getmtime(kandidaat), 315532800))[:6]
+    return time.localtime()[:6]
+
+
+# ======================
+# SELECTIE VAN BESTANDEN
+# ======================
+
+def _mapnaam(document_map: Optional[models.DocumentMap]) -> str:
+    return os.path.basename((document_map.naam or "").replace("\\", "/")) if document_map else ""
+
+
+def bestanden_van_project(db: Session, project_id: int) -> list[tuple[str, str]]:
+    documenten = (
+        db.query(models.Document)
+        .options(joinedload(models.Document.map))
+        .filter(models.Document.project_id == project_id, models.Document.pad.isnot(None))
+        .all()
+    )
+    bestanden = []
+    for doc in documenten:
+        if not doc.pad:
+            continue
+        mapnaam = _mapnaam(doc.map)
+        naam = os.path.basename(doc.bestandsnaam or doc.pad)
+        bestanden.append((f"{mapnaam}/{naam}" if mapnaam else naam, doc.pad))
+    return sorted(bestanden)
+
+
+def bestanden_van_map(document_map: models.DocumentMap) -> list[tuple[str, str]]:
+    return sorted(
+        (os.path.basename(doc.bestandsnaam or doc.pad), doc.pad)
+        for doc in document_map.documenten
+        if doc.pad
+    )
@@ -0,0 +1,102 @@
+"""Meet de doorvoer van app.server bij een oplopend aantal workers.
+
+    python scripts/bench_workers.py --workers 1 2 4 --duur 10
+
+Start per stap een server in een tijdelijke map met een gevulde SQLite-database en
+bestookt ``GET /klanten/`` vanuit meerdere threads. Rate limiting staat daarbij uit.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ERP_APP = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def wacht_tot_klaar(port: int, timeout: float = 30):
+    einde = time.monotonic() + timeout
+    while time.monotonic() < einde:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/ready")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server werd niet klaar")
+
+
+def vul_database(port: int, aantal: int):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    for i in range(aantal):
+        body = (
+            '{"voornaam": "Test", "achternaam": "Klant%d", "straatnaam": "Straat", "huisnummer": "%d",'
+            ' "postcode": "1234 AB", "woonplaats": "Utrecht", "email": "klant%d@example.com",'
+            ' "telefoon": "06%08d", "klantnummer": "KLT-%04d", "klanttype": "particulier"}' % (i, i, i, i, i)
+        )
+        # Testklanten lijken bewust op elkaar; sla de duplicaatcontrole over
+        conn.request("POST", "/klanten/?negeer_duplicaten=true", body, {"Content-Type": "application/json"})
+        antwoord = conn.getresponse()
+        inhoud = antwoord.read()
+        if antwoord.status != 200:
+            raise RuntimeError(f"klant {i} aanmaken mislukt: {antwoord.status} {inhoud[:200]!r}")
+
+
+def belast(port: int, duur: float, threads: int, pad: str) -> float:
+    teller = [0] * threads
+    einde = time.monotonic() + duur
+
+    def werker(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        while time.monotonic() < einde:
+            conn.request("GET", pad)
+            conn.getresponse().read()
+            teller[i] += 1
+
+    pool = [threading.Thread(target=werker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(teller) / duur
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duur", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--klanten", type=int, default=100)
+    parser.add_argument("--pad", default="/klanten/?limit=50")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}, pad: {args.pad}, threads: {args.threads}, duur: {args.duur}s")
+    basis = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as map_:
+            env = dict(os.environ, RATE_LIMIT_UIT="1", PYTHONPATH=ERP_APP)
+            server = subprocess.Popen(
+                [sys.executable, "-m", "app.server", "--workers", str(workers), "--port", str(args.port),
+                 "--log-level", "warning"],
+                cwd=map_, env=env,
+            )
+            try:
+                wacht_tot_klaar(args.port)
+                vul_database(args.port, args.klanten)
+                belast(args.port, 1, args.threads, args.pad)  # opwarmen
+                rps = belast(args.port, args.duur, args.threads, args.pad)
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+        basis = basis or rps
+        print(f"workers={workers:<3} {rps:8.1f} req/s  (x{rps / basis:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Genereer app/data/pc4_centroiden.csv uit de open CBS-postcodevlakken (PDOK).
+
+    python scripts/pc4_centroiden.py
+    python scripts/pc4_centroiden.py --bron postcode4.geojson
+
+Zonder ``--bron`` worden alle PC4-vlakken pagina voor pagina van de PDOK OGC API
+gehaald (GeoJSON in WGS84). Met ``--bron`` kan een lokaal GeoJSON-bestand worden
+gebruikt, bijvoorbeeld een export van de CBS-kaart "Postcode4". Per postcode wordt
+het oppervlaktegewogen zwaartepunt van de vlakken berekend.
+"""
+import argparse
+import csv
+import json
+import os
+import urllib.request
+
+PDOK_URL = "https://api.pdok.nl/cbs/postcode4/ogc/v1/collections/postcode4/items?f=json&limit=1000"
+DOEL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app", "data", "pc4_centroiden.csv"))
+
+
+def features(bron: str):
+    """Alle features uit een bestand of, bij een URL, uit alle pagina's van de OGC API."""
+    if not bron.startswith(("http://", "https://")):
+        with open(bron, encoding="utf-8") as f:
+            yield from json.load(f)["features"]
+        return
+    url = bron
+    while url:
+        with urllib.request.urlopen(url, timeout=60) as antwoord:
+            pagina = json.load(antwoord)
+        yield from pagina["features"]
+        url = next((l["href"] for l in pagina.get("links", []) if l.get("rel") == "next"), None)
+
+
+def _ring(ring: list) -> tuple[float, float, float]:
+    """Oppervlakte en zwaartepunt (lon, lat) van een ring met de shoelace-formule."""
+    a = cx = cy = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        kruis = x1 * y2 - x2 * y1
+        a += kruis
+        cx += (x1 + x2) * kruis
+        cy += (y1 + y2) * kruis
+    a /= 2
+    if a == 0:
+        return 0.0, ring[0][0], ring[0][1]
+    return a, cx / (6 * a), cy / (6 * a)
+
+
+def zwaartepunt(geometrie: dict) -> tuple[float, float]:
+    polygonen = geometrie["coordinates"]
+    if geometrie["type"] == "Polygon":
+        polygonen = [polygonen]
+    totaal = sx = sy = 0.0
+    for polygoon in polygonen:
+        # Buitenring telt positief, gaten negatief
+        for i, ring in enumerate(polygoon):
+            a, x, y = _ring([tuple(p[:2]) for p in ring])
+            a = abs(a) if i == 0 else -abs(a)
+            totaal += a
+            sx += a * x
+            sy += a * y
+    if totaal == 0:
+        eerste = polygonen[0][0][0]
+        return eerste[1], eerste[0]
+    return sy / totaal, sx / totaal  # (lat, lon)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bron", default=PDOK_URL, help="GeoJSON-bestand of OGC API-URL")
+    parser.add_argument("--veld", default="postcode", help="eigenschap met de viercijferige postcode")
+    parser.add_argument("--doel", default=DOEL)
+    args = parser.parse_args()
+
+    # Een postcode kan uit meerdere features bestaan; weeg die mee via de vlakken zelf
+    per_postcode: dict[str, list] = {}
+    for feature in features(args.bron):
+        postcode = str(feature["properties"].get(args.veld) or "").strip()
+        if len(postcode) == 4 and postcode.isdigit() and feature.get("geometry"):
+            per_postcode.setdefault(postcode, []).append(feature["geometry"])
+
+    with open(args.doel, "w", newline="", encoding="utf-8") as f:
+        schrijver = csv.writer(f)
+        schrijver.writerow(["postcode", "lat", "lon"])
+        for postcode in sorted(per_postcode):
+            geometrie = {"type": "MultiPolygon", "coordinates": [
+                p for g in per_postcode[postcode]
+                for p in (g["coordinates"] if g["type"] == "MultiPolygon" else [g["coordinates"]])
+            ]}
+            lat, lon = zwaartepunt(geometrie)
+            schrijver.writerow([postcode, f"{lat:.4f}", f"{lon:.4f}"])
+    print(f"{len(per_postcode)} postcodes geschreven naar {args.doel}")
+
+
+if __name__ == "__main__":
+    main()